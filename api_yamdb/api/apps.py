@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from core.signals import connect_cache_invalidation
+
+        from . import views  # noqa: F401
+        from .mixins import get_cache_models
+
+        connect_cache_invalidation(get_cache_models())
@@ -1,4 +1,10 @@
+from django.core.cache import cache
 from rest_framework import mixins, viewsets
+from rest_framework.response import Response
+
+from core import writer
+from core.cache import get_response_key, get_timeout
+from core.metrics import api_cache_requests
 
 
 class ListCreateDestroyViewSet(
@@ -8,3 +14,74 @@ class ListCreateDestroyViewSet(
     viewsets.GenericViewSet,
 ):
     pass
+
+
+class QueuedWriteMixin:
+    """Сохранение и удаление объектов через очередь записи
+    core.writer: при включенной очереди записи из всех потоков процесса
+    выполняются одним потоком и фиксируются группами.
+    """
+
+    def queued_save(self, serializer, **kwargs):
+        instance = serializer.instance
+
+        def save():
+            # При повторе группы после блокировки БД сохранение
+            # начинается заново, а не обновляет несохраненный объект.
+            serializer.instance = instance
+            serializer.save(**kwargs)
+        writer.run(save)
+
+    def perform_create(self, serializer):
+        self.queued_save(serializer)
+
+    def perform_update(self, serializer):
+        self.queued_save(serializer)
+
+    def perform_destroy(self, instance):
+        writer.run(instance.delete)
+
+
+class CachedListMixin:
+    """Кеширует данные ответов list. Данные сохраняются до вывода,
+    поэтому формат ответа по-прежнему выбирается по запросу.
+    В cache_models перечисляются все модели, от которых зависит ответ.
+    Без API_CACHE_TIMEOUT кеш не используется.
+    """
+    cache_models = ()
+
+    def cached(self, action, request, *args, **kwargs):
+        timeout = get_timeout()
+        if not timeout:
+            return action(request, *args, **kwargs)
+        key = get_response_key(request, self.cache_models)
+        data = cache.get(key)
+        if data is not None:
+            api_cache_requests.inc(result='hit')
+            return Response(data)
+        api_cache_requests.inc(result='miss')
+        response = action(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+
+def get_cache_models():
+    """Модели из cache_models всех представлений с кешем."""
+    models = set()
+    classes = [CachedListMixin]
+    while classes:
+        cls = classes.pop()
+        classes.extend(cls.__subclasses__())
+        models.update(cls.cache_models)
+    return models
+
+
+class CachedReadMixin(CachedListMixin):
+    """Кеширует данные ответов list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
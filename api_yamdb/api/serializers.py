@@ -1,3 +1,4 @@
+from django.contrib.auth.models import update_last_login
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
@@ -24,6 +25,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         user = get_object_or_404(User, username=username)
         if user.confirmation_code != confirmation_code:
             raise ValidationError(detail='Код не корректный')
+        if user.last_login is None:
+            update_last_login(None, user)
         data = {}
         return data
 
@@ -64,12 +67,11 @@ class TitleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Title
         fields = '__all__'
+        read_only_fields = ('rating',)
 
 
 class ReadOnlyTitleSerializer(serializers.ModelSerializer):
-    rating = serializers.IntegerField(
-        source='reviews__score__avg', read_only=True
-    )
+    rating = serializers.IntegerField(read_only=True)
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
 
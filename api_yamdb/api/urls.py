@@ -8,6 +8,8 @@ from api.views import (
     TitleViewSet,
     CustomTokenObtainPairView,
     CommentViewSet,
+    RequestProfileView,
+    RequestTimingsView,
     ReviewViewSet,
 )
 
@@ -38,7 +40,8 @@ auth_endpoints = [
     ),
     path(
         'signup/',
-        RegisterUserViewSet.as_view({'post': 'create'})
+        RegisterUserViewSet.as_view({'post': 'create'}),
+        name='signup'
     ),
     path(
         'token/refresh/',
@@ -49,5 +52,11 @@ auth_endpoints = [
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
-    path('v1/auth/', include(auth_endpoints))
+    path('v1/auth/', include(auth_endpoints)),
+    path('v1/timings/', RequestTimingsView.as_view(), name='timings'),
+    path(
+        'v1/profiles/<str:profile_id>/',
+        RequestProfileView.as_view(),
+        name='profile'
+    ),
 ]
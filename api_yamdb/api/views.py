@@ -1,13 +1,20 @@
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Avg
-from rest_framework import viewsets, filters
+from rest_framework import status, viewsets, filters
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from reviews.models import Category, Genre, Review, Title, Comment
-from .mixins import ListCreateDestroyViewSet
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title)
+from users.models import User
+from .mixins import (CachedListMixin, CachedReadMixin,
+                     ListCreateDestroyViewSet, QueuedWriteMixin)
+from core.metrics import timings
+from core.profiling import get_profile
 from reviews.filters import TitlesFilter
+from users.permissions import IsAdministratorRole
 from .permissions import (
     IsAuthorAdminModeratorOrReadOnly,
     IsAdminOrReadOnly
@@ -23,41 +30,44 @@ from .serializers import (
 )
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(CachedListMixin, ListCreateDestroyViewSet):
     """
     Получить список всех категорий.
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = (Category,)
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(CachedListMixin, ListCreateDestroyViewSet):
     """
     Получить список всех жанров.
     """
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = (Genre,)
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(CachedReadMixin, viewsets.ModelViewSet):
     """
     Получить список всех объектов.
     """
-    queryset = Title.objects.all().annotate(
-        Avg('reviews__score')
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre'
     ).order_by('name')
     serializer_class = TitleSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitlesFilter
+    cache_models = (Title, Genre, GenreTitle, Category, Review)
 
     def get_serializer_class(self):
         if self.action in ('retrieve', 'list'):
@@ -74,7 +84,9 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    CachedReadMixin, QueuedWriteMixin, viewsets.ModelViewSet
+):
     """Вьюсет ReviewViewSet.
     Во вьюсете переопределяем метод perform_create().
     При создании отзыва значение автора берем из объекта request: в нем
@@ -90,18 +102,25 @@ class ReviewViewSet(viewsets.ModelViewSet):
     """
     permission_classes = (IsAuthorAdminModeratorOrReadOnly,)
     serializer_class = ReviewSerializer
+    cache_models = (Review, Title, User)
 
     def get_title(self):
         return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
 
     def get_queryset(self):
-        return Review.objects.filter(title=self.get_title())
+        return Review.objects.filter(
+            title=self.get_title()
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        self.queued_save(
+            serializer, author=self.request.user, title=self.get_title()
+        )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    CachedReadMixin, QueuedWriteMixin, viewsets.ModelViewSet
+):
     """Вьюсет CommentViewSet.
     Во вьюсете переопределяем метод perform_create().
     - При создании комментария значение автора берем из объекта request: в нем
@@ -119,12 +138,48 @@ class CommentViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAuthorAdminModeratorOrReadOnly,)
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    cache_models = (Comment, Review, User)
 
     def get_review(self):
         return get_object_or_404(Review, pk=self.kwargs.get('review_id'))
 
     def get_queryset(self):
-        return Comment.objects.filter(review=self.get_review())
+        return Comment.objects.filter(
+            review=self.get_review()
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        self.queued_save(
+            serializer, author=self.request.user, review=self.get_review()
+        )
+
+
+class RequestTimingsView(APIView):
+    """Задержки запросов по представлениям с запуска процесса:
+    число запросов, среднее и перцентили p50, p95, p99 общего времени
+    и средние по этапам (мс). Доступно только администратору.
+    DELETE сбрасывает накопленные данные.
+    """
+    permission_classes = (IsAdministratorRole,)
+
+    def get(self, request):
+        return Response(timings.summary())
+
+    def delete(self, request):
+        timings.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class RequestProfileView(APIView):
+    """Профиль запроса, выполненного с заголовком X-Profile:
+    самые затратные функции по общему и собственному времени
+    и хронология запросов к БД. Идентификатор - из заголовка ответа
+    X-Profile-Id. Доступно только администратору.
+    """
+    permission_classes = (IsAdministratorRole,)
+
+    def get(self, request, profile_id):
+        profile = get_profile(profile_id)
+        if profile is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(profile)
@@ -30,7 +30,11 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
+    'core.middleware.RequestTimingMiddleware',
+    'core.querylog.QueryInspectionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -67,10 +71,115 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Реплики для чтения: пути к копиям основной базы через запятую
+# в DB_REPLICAS. Копии обновляет команда sync_replicas.
+READ_REPLICAS = []
+for number, name in enumerate(os.getenv('DB_REPLICAS', '').split(',')):
+    if name:
+        alias = f'replica_{number + 1}'
+        DATABASES[alias] = dict(
+            DATABASES['default'], NAME=name, TEST={'MIRROR': 'default'}
+        )
+        READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReadReplicaRouter']
+
+# Представления, GET и HEAD запросы к которым читают с реплик.
+READ_REPLICA_VIEWS = (
+    'api.views.TitleViewSet',
+    'api.views.ReviewViewSet',
+    'api.views.CommentViewSet',
+    'api.views.CategoryViewSet',
+    'api.views.GenreViewSet',
+)
+
+# Сколько секунд после записи клиент читает из основной базы.
+READ_YOUR_WRITES_WINDOW = 5
+
+# PRAGMA, которые выставляются каждому новому соединению с SQLite:
+# WAL позволяет читать во время записи, при блокировке соединение
+# ждет busy_timeout мс вместо немедленной ошибки "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+# Очередь записи (core.writer): записи отзывов и комментариев из всех
+# потоков процесса выполняет один поток, группами до BATCH_SIZE,
+# собранными за WINDOW с; при блокировке БД группа повторяется до
+# RETRIES раз с паузой от BACKOFF с, растущей вдвое.
+WRITE_QUEUE = {
+    'ENABLED': os.getenv('WRITE_QUEUE_ENABLED', 'False') == 'True',
+    'BATCH_SIZE': 50,
+    'WINDOW': 0.002,
+    'RETRIES': 8,
+    'BACKOFF': 0.01,
+}
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Время жизни кешированных ответов API на чтение (core.cache), с;
+# 0 - кеш ответов выключен. Включайте только с общим для всех
+# процессов кешем (CACHE_BACKEND memcached или файловый): версии
+# моделей в LocMemCache меняются лишь в процессе, который записал
+# данные, и остальные процессы отдавали бы устаревшие ответы.
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', '0'))
+# Поиск N+1 и медленных запросов (core.querylog), для разработки:
+# QUERY_INSPECTION=True. В тестах включается всегда.
+QUERY_INSPECTION = {
+    'ENABLED': os.getenv('QUERY_INSPECTION', 'False') == 'True',
+    'REPEAT_THRESHOLD': 5,
+    'SLOW_QUERY_MS': 100,
+}
+
+# Наибольшее число запросов к БД на один запрос к API, включая
+# поиск пользователя по токену.
+QUERY_BUDGETS = {
+    'GET api:titles-list': 4,
+    'GET api:titles-detail': 3,
+    'GET api:reviews-list': 4,
+    'GET api:reviews-detail': 3,
+    'GET api:comments-list': 4,
+    'GET api:comments-detail': 3,
+    'GET api:categories-list': 3,
+    'GET api:genres-list': 3,
+}
+# Профилирование запроса администратора с заголовком X-Profile
+# (core.profiling): TOP функций, не больше MAX_QUERIES запросов к БД
+# в хронологии, результат хранится в кеше TIMEOUT секунд.
+PROFILING = {
+    'HEADER': 'HTTP_X_PROFILE',
+    'TOP': 30,
+    'MAX_QUERIES': 500,
+    'TIMEOUT': 3600,
+}
+# Доступ к /metrics: токен для заголовка Authorization: Bearer или
+# сети сборщика Prometheus через запятую. По умолчанию сетей нет:
+# за обратным прокси на том же хосте REMOTE_ADDR любого запроса -
+# адрес прокси, и доверие к 127.0.0.1 открыло бы метрики всем.
+# Сети указывайте, только если сборщик обращается к приложению
+# напрямую, минуя прокси, а в прокси закройте путь /metrics.
+METRICS_ALLOWED_NETWORKS = [
+    network.strip()
+    for network in os.getenv('METRICS_ALLOWED_NETWORKS', '').split(',')
+    if network.strip()
+]
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,6 +223,15 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5
 }
@@ -125,7 +243,7 @@ SIMPLE_JWT = {
 
 MAIL_FROM = 'from@example.com'
 
-CSV_DIR = os.path.join(BASE_DIR, 'static/data/')
+CSV_DIR = os.getenv('CSV_DIR', os.path.join(BASE_DIR, 'static/data/'))
 
 DICT_TABLE = {
     'genre.csv': 'reviews_genre',
@@ -134,5 +252,21 @@ DICT_TABLE = {
     'genre_title.csv': 'reviews_genretitle',
     'review.csv': 'reviews_review',
     'titles.csv': 'reviews_title',
-    'users.csv': 'reviews_user'
+    'users.csv': 'users_user'
+}
+
+CSV_EXPORT_DIR = os.getenv(
+    'CSV_EXPORT_DIR', os.path.join(BASE_DIR, 'static/export/')
+)
+
+CSV_COLUMNS = {
+    'genre.csv': ('id', 'name', 'slug'),
+    'category.csv': ('id', 'name', 'slug'),
+    'comments.csv': ('id', 'review_id', 'text', 'author', 'pub_date'),
+    'genre_title.csv': ('id', 'title_id', 'genre_id'),
+    'review.csv': ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    'titles.csv': ('id', 'name', 'year', 'category'),
+    'users.csv': (
+        'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'
+    ),
 }
@@ -0,0 +1,59 @@
+"""Настройки для боевого запуска API:
+DJANGO_SETTINGS_MODULE=api_yamdb.settings_production.
+
+Отличия от api_yamdb.settings:
+- DEBUG выключен: нет журнала SQL-запросов и отладки шаблонов,
+  шаблоны загружаются через кеширующий загрузчик;
+- middleware для браузера (сессии, CSRF, сообщения, защита от
+  кликджекинга) не выполняются для запросов к /api/, их по-прежнему
+  получают админка и redoc;
+- API отдает только JSON, без Browsable API и его шаблонов;
+- SECRET_KEY и ALLOWED_HOSTS задаются только переменными окружения:
+  без SECRET_KEY запуск невозможен, без ALLOWED_HOSTS Django отвечает
+  400 на запросы с любым Host.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import REST_FRAMEWORK, os
+
+SECRET_KEY = os.getenv('SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured(
+        'Для settings_production задайте переменную окружения SECRET_KEY'
+    )
+
+DEBUG = os.getenv('DEBUG', 'False') == 'True'
+
+ALLOWED_HOSTS = [
+    host.strip() for host in os.getenv('ALLOWED_HOSTS', '').split(',')
+    if host.strip()
+]
+
+MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
+    'core.middleware.RequestTimingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'core.middleware.BrowserMiddleware',
+]
+
+API_PREFIX = '/api/'
+
+BROWSER_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+REST_FRAMEWORK = dict(
+    REST_FRAMEWORK,
+    DEFAULT_RENDERER_CLASSES=['core.renderers.FastJSONRenderer'],
+)
+
+# Middleware, которые нужны админке, выполняются внутри
+# BrowserMiddleware, а проверки админки ищут их в MIDDLEWARE.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
@@ -0,0 +1,50 @@
+"""Кеш ответов API на чтение с версиями моделей.
+
+Ключ ответа включает версии всех моделей, от которых он зависит.
+Любое сохранение или удаление объекта модели (и изменение связей
+многие ко многим) меняет ее версию, поэтому старые ответы больше
+не находятся и вытесняются по времени жизни. Изменения в обход
+сигналов (QuerySet.update, загрузка import_csv) нужно отмечать
+вызовом invalidate().
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def get_version_key(model):
+    return f'cache-version:{model._meta.label_lower}'
+
+
+def invalidate(*models):
+    # Новая версия - текущее время, а не счетчик: после вытеснения
+    # ключа версии из кеша прежние значения не повторятся.
+    cache.set_many(
+        {get_version_key(model): time.time_ns() for model in models},
+        timeout=None
+    )
+
+
+def get_versions(models):
+    keys = [get_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        initial = {key: time.time_ns() for key in missing}
+        cache.set_many(initial, timeout=None)
+        versions.update(initial)
+    return [versions[key] for key in keys]
+
+
+def get_response_key(request, models):
+    versions = ':'.join(str(version) for version in get_versions(models))
+    # В ответе есть абсолютные ссылки пагинации, поэтому ключ зависит
+    # от хоста и полного адреса запроса.
+    url = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()
+    return f'api-response:{url}:{versions}'
+
+
+def get_timeout():
+    return getattr(settings, 'API_CACHE_TIMEOUT', 0)
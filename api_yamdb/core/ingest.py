@@ -0,0 +1,217 @@
+"""Чтение файлов с данными и приведение значений к типам полей моделей.
+
+Основной движок построен на модуле csv стандартной библиотеки: строки
+читаются потоком и сразу превращаются в кортежи значений для вставки.
+pandas импортируется только при явном выборе движка pandas.
+Кроме csv поддерживаются csv и jsonl, сжатые gzip (распаковываются
+потоком), и parquet (читается пакетами колонок через pyarrow).
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime, time
+from itertools import islice
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connection, models
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+
+
+# Расширения файлов данных в порядке поиска.
+SUFFIXES = ('.csv', '.csv.gz', '.parquet', '.jsonl', '.jsonl.gz')
+
+PARQUET_BATCH_SIZE = 65536
+
+
+def find_data_file(directory, file_csv):
+    """Файл данных для записи DICT_TABLE: сам файл csv или файл
+    с тем же именем в другом поддерживаемом формате.
+    """
+    stem = file_csv[:-len('.csv')] if file_csv.endswith('.csv') else file_csv
+    for suffix in SUFFIXES:
+        path = os.path.join(directory, stem + suffix)
+        if os.path.exists(path):
+            return path
+    return os.path.join(directory, file_csv)
+
+
+def is_plain_csv(path):
+    """Только в несжатом csv байтовое смещение совпадает с границей
+    строк, поэтому дописанные строки читаются только из него.
+    """
+    return path.endswith('.csv')
+
+
+def open_at(path, offset=0):
+    """Текстовый поток файла, начиная с байтового смещения."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    file = open(path, 'rb')
+    file.seek(offset)
+    return io.TextIOWrapper(file, encoding='utf-8', newline='')
+
+
+def read_header(path):
+    with open_at(path) as file:
+        return next(csv.reader(file))
+
+
+def read_csv_chunks(path, chunksize=None, offset=0):
+    """Заголовок и строки файла частями по chunksize строк.
+    Значения остаются строками, пустое поле - пустая строка.
+    """
+    header = read_header(path)
+    with open_at(path, offset) as file:
+        reader = csv.reader(file)
+        if not offset:
+            next(reader)
+        while True:
+            rows = list(islice(reader, chunksize))
+            if rows:
+                yield header, rows
+            if not rows or chunksize is None:
+                return
+
+
+def read_pandas_chunks(path, chunksize=None, offset=0):
+    """То же, что read_csv_chunks, но разбор выполняет pandas."""
+    import pandas as pd
+
+    header = read_header(path)
+    options = {'dtype': str, 'keep_default_na': False}
+    if offset:
+        options.update(names=header, header=None)
+    with open_at(path, offset) as file:
+        if chunksize is None:
+            chunks = [pd.read_csv(file, **options)]
+        else:
+            chunks = pd.read_csv(file, chunksize=chunksize, **options)
+        for df in chunks:
+            yield header, df.values.tolist()
+
+
+def read_jsonl_chunks(path, chunksize=None, offset=0):
+    """Файл с объектом JSON в каждой строке. Колонки берутся из
+    ключей первого объекта, значения сохраняют типы JSON.
+    """
+    header = None
+    with open_at(path, offset) as file:
+        records = (json.loads(line) for line in file if line.strip())
+        while True:
+            records_chunk = list(islice(records, chunksize))
+            if not records_chunk:
+                return
+            if header is None:
+                header = list(records_chunk[0])
+            yield header, [
+                [record.get(name) for name in header]
+                for record in records_chunk
+            ]
+            if chunksize is None:
+                return
+
+
+def read_parquet_chunks(path, chunksize=None, offset=0):
+    """Файл parquet, прочитанный пакетами колонок."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImproperlyConfigured(
+            'Для загрузки файлов parquet установите пакет pyarrow'
+        )
+    parquet = pq.ParquetFile(path)
+    header = parquet.schema_arrow.names
+    batches = parquet.iter_batches(
+        batch_size=chunksize or PARQUET_BATCH_SIZE
+    )
+    for batch in batches:
+        columns = [column.to_pylist() for column in batch.columns]
+        yield header, [list(row) for row in zip(*columns)]
+
+
+class InvalidValue:
+    """Значение из файла, которое не удалось привести к типу поля."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __repr__(self):
+        return repr(self.raw)
+
+
+READERS = {
+    'csv': read_csv_chunks,
+    'pandas': read_pandas_chunks,
+}
+
+
+def get_reader(path, engine):
+    """Функция чтения по расширению файла; для csv - по движку."""
+    if path.endswith('.parquet'):
+        return read_parquet_chunks
+    if path.endswith(('.jsonl', '.jsonl.gz')):
+        return read_jsonl_chunks
+    return READERS[engine]
+
+
+def parse_datetime_value(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(f'Некорректная дата: {value}')
+        parsed = datetime.combine(date, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return connection.ops.adapt_datetimefield_value(parsed)
+
+
+def parse_boolean_value(value):
+    return value.strip().lower() in ('1', 'true', 't', 'yes')
+
+
+def get_parser(field):
+    """Разбор непустой строки в значение для колонки поля."""
+    if field.is_relation:
+        return get_parser(field.target_field)
+    if isinstance(field, (models.AutoField, models.IntegerField)):
+        return int
+    if isinstance(field, (models.CharField, models.TextField)):
+        return str
+    if isinstance(field, models.DateTimeField):
+        return parse_datetime_value
+    if isinstance(field, models.BooleanField):
+        return parse_boolean_value
+
+    def parse(value):
+        return field.get_db_prep_save(field.to_python(value), connection)
+    return parse
+
+
+def get_converter(field):
+    """Функция, превращающая строку из файла в значение для вставки
+    в колонку поля. Для частых типов полей значение разбирается
+    напрямую, для остальных используется to_python поля.
+    Значения parquet и jsonl уже имеют тип и только подготавливаются
+    для БД. Значение, которое не удалось разобрать, заменяется
+    на InvalidValue.
+    """
+    parse = get_parser(field)
+    empty = '' if not field.null and field.empty_strings_allowed else None
+
+    def prepare_typed(value):
+        return field.get_db_prep_save(field.to_python(value), connection)
+
+    def convert(value):
+        if value == '' or value is None:
+            return empty
+        try:
+            if isinstance(value, str):
+                return parse(value)
+            return prepare_typed(value)
+        except (TypeError, ValueError, ValidationError):
+            return InvalidValue(value)
+    return convert
@@ -0,0 +1,100 @@
+import csv
+import gzip
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.management.commands.import_csv import get_table_models
+
+FORMATTER = '%(asctime)s — %(levelname)s — %(message)s'
+
+logging.basicConfig(
+    level=logging.INFO,
+    format=FORMATTER
+)
+
+
+def to_csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class Command(BaseCommand):
+    """Выгружает таблицы из DICT_TABLE в файлы csv в том же формате,
+    в котором их загружает import_csv. Строки читаются из БД частями,
+    поэтому расход памяти не зависит от размера таблицы.
+    """
+    help = 'Выгрузка данных из БД в файлы csv'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=settings.CSV_EXPORT_DIR,
+            help='Каталог для файлов выгрузки'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжимать файлы gzip (имя файла получает суффикс .gz)'
+        )
+        parser.add_argument(
+            '--chunksize', type=int, default=2000,
+            help='Количество строк, получаемых из БД за один раз'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Количество таблиц, выгружаемых параллельно'
+        )
+
+    def export_table(self, file_csv, model, output, compress, chunksize):
+        """Выполняется в отдельном потоке со своим подключением к БД."""
+        started = time.monotonic()
+        columns = settings.CSV_COLUMNS[file_csv]
+        fields = [model._meta.get_field(name).attname for name in columns]
+        rows = model.objects.order_by('pk').values_list(
+            *fields
+        ).iterator(chunk_size=chunksize)
+        path = os.path.join(output, file_csv)
+        if compress:
+            path += '.gz'
+            file = gzip.open(path, 'wt', encoding='utf-8', newline='')
+        else:
+            file = open(path, 'w', encoding='utf-8', newline='')
+        count = 0
+        try:
+            with file:
+                writer = csv.writer(file)
+                writer.writerow(columns)
+                for row in rows:
+                    writer.writerow([to_csv_value(value) for value in row])
+                    count += 1
+        finally:
+            connection.close()
+        elapsed = time.monotonic() - started
+        logging.info(
+            f'Выгружена таблица {model._meta.db_table} в {path}: '
+            f'{count} строк за {elapsed:.2f} с'
+        )
+        return count
+
+    def handle(self, *args, **kwargs):
+        output = kwargs['output']
+        os.makedirs(output, exist_ok=True)
+        table_models = get_table_models()
+        with ThreadPoolExecutor(max_workers=kwargs['workers']) as pool:
+            futures = [
+                pool.submit(
+                    self.export_table, file_csv, table_models[table],
+                    output, kwargs['gzip'], kwargs['chunksize']
+                )
+                for file_csv, table in settings.DICT_TABLE.items()
+            ]
+            for future in futures:
+                future.result()
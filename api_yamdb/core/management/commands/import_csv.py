@@ -1,9 +1,24 @@
-from django.core.management.base import BaseCommand
-import sqlite3
-import pandas as pd
+import hashlib
+import time
+from contextlib import nullcontext
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
 import os
 import logging
-from api_yamdb.settings import DICT_TABLE, CSV_DIR
+
+from core.cache import invalidate
+from core.ingest import (
+    READERS, find_data_file, get_converter, get_reader, is_plain_csv
+)
+from core.models import ImportManifest
+from core.sqlite import bulk_load
+from core.validation import FileValidator, KnownKeys
+from reviews.models import Review, Title
 
 FORMATTER = '%(asctime)s — %(levelname)s — %(message)s'
 
@@ -13,24 +28,394 @@ logging.basicConfig(
 )
 
 
+def get_table_models():
+    """Соответствие имени таблицы в БД и модели."""
+    return {model._meta.db_table: model for model in apps.get_models()}
+
+
+# Оператор сравнения, который считает NULL обычным значением.
+UPSERT_DISTINCT = {
+    'sqlite': 'IS NOT',
+    'postgresql': 'IS DISTINCT FROM',
+}
+
+
+def sort_by_dependencies(dict_table, table_models):
+    """Файлы из DICT_TABLE в порядке зависимостей моделей по внешним
+    ключам: таблица загружается после всех таблиц, на которые ссылается.
+    """
+    files = {table: file_csv for file_csv, table in dict_table.items()}
+    dependencies = {}
+    for table in files:
+        related = {
+            field.related_model._meta.db_table
+            for field in table_models[table]._meta.concrete_fields
+            if field.is_relation
+        }
+        dependencies[table] = (related & set(files)) - {table}
+    order = []
+    while dependencies:
+        ready = [
+            table for table, related in dependencies.items()
+            if not related
+        ]
+        if not ready:
+            raise CommandError(
+                'Циклическая зависимость таблиц: '
+                f'{", ".join(dependencies)}'
+            )
+        for table in ready:
+            order.append((files[table], table_models[table]))
+            del dependencies[table]
+        for related in dependencies.values():
+            related.difference_update(ready)
+    return order
+
+
+def file_fingerprint(path, prefix_size=None):
+    """Размер, время изменения и sha256 файла. Если задан prefix_size,
+    за тот же проход считается sha256 первых prefix_size байт.
+    """
+    stat = os.stat(path)
+    hasher = hashlib.sha256()
+    prefix_sha256 = None
+    read = 0
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            if prefix_size is not None and read < prefix_size <= (
+                read + len(block)
+            ):
+                head = hasher.copy()
+                head.update(block[:prefix_size - read])
+                prefix_sha256 = head.hexdigest()
+            hasher.update(block)
+            read += len(block)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': hasher.hexdigest(),
+        'prefix_sha256': prefix_sha256,
+    }
+
+
+def ends_with_newline(path, size):
+    with open(path, 'rb') as file:
+        file.seek(size - 1)
+        return file.read(1) == b'\n'
+
+
+def get_field_default(field):
+    if getattr(field, 'auto_now', False) or getattr(
+        field, 'auto_now_add', False
+    ):
+        value = timezone.now()
+    else:
+        value = field.get_default()
+    return field.get_db_prep_save(value, connection)
+
+
 class Command(BaseCommand):
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunksize', type=int, default=None,
+            help='Читать файлы частями по указанному числу строк, '
+                 'чтобы расход памяти не зависел от размера файла'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк в одном запросе executemany'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Добавлять новые и обновлять измененные строки вместо '
+                 'ошибки при повторной загрузке'
+        )
+
+        parser.add_argument(
+            '--engine', choices=tuple(READERS), default='csv',
+            help='Движок разбора файлов csv: модуль csv стандартной '
+                 'библиотеки или pandas'
+        )
+        parser.add_argument(
+            '--bulk', action='store_true',
+            help='Первичная загрузка в SQLite: вторичные индексы удаляются '
+                 'на время загрузки и создаются заново в конце'
+        )
+        parser.add_argument(
+            '--no-validate', dest='validate', action='store_false',
+            help='Не проверять файлы перед загрузкой'
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Пропускать файлы, не изменившиеся с прошлой загрузки, '
+                 'а из дописанных файлов загружать только новые строки'
+        )
+
+    def read_chunks(self, file_csv, chunksize, offset=0):
+        path = find_data_file(settings.CSV_DIR, file_csv)
+        return get_reader(path, self.engine)(path, chunksize, offset)
+
+    def plan_file(self, file_csv, manifest, incremental):
+        """Смещение, с которого нужно читать файл (None - файл не
+        изменился), и отпечаток файла для манифеста.
+        """
+        path = find_data_file(settings.CSV_DIR, file_csv)
+        if not incremental or manifest is None:
+            return 0, file_fingerprint(path)
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) == (
+            manifest.size, manifest.mtime_ns
+        ):
+            return None, None
+        fingerprint = file_fingerprint(path, prefix_size=manifest.size)
+        if fingerprint['sha256'] == manifest.sha256:
+            return None, fingerprint
+        if (
+            is_plain_csv(path)
+            and fingerprint['prefix_sha256'] == manifest.sha256
+            and ends_with_newline(path, manifest.size)
+        ):
+            return manifest.size, fingerprint
+        return 0, fingerprint
+
+    def plan_files(self, order, incremental):
+        """Список файлов для загрузки: файл, модель, смещение начала
+        чтения, отпечаток файла и число уже загруженных строк.
+        """
+        manifests = {}
+        if incremental:
+            manifests = ImportManifest.objects.in_bulk(
+                [file_csv for file_csv, _ in order], field_name='file_name'
+            )
+        plan = []
+        for file_csv, model in order:
+            manifest = manifests.get(file_csv)
+            offset, fingerprint = self.plan_file(
+                file_csv, manifest, incremental
+            )
+            if offset is None:
+                if fingerprint is not None:
+                    self.save_manifest(file_csv, fingerprint, manifest.rows)
+                logging.info(f'Файл {file_csv} не изменился, пропущен')
+                continue
+            known = manifest.rows if offset else 0
+            plan.append((file_csv, model, offset, fingerprint, known))
+        return plan
+
+    def save_manifest(self, file_csv, fingerprint, rows):
+        ImportManifest.objects.update_or_create(
+            file_name=file_csv,
+            defaults={
+                'size': fingerprint['size'],
+                'mtime_ns': fingerprint['mtime_ns'],
+                'sha256': fingerprint['sha256'],
+                'rows': rows,
+            }
+        )
+
+    def get_columns(self, model, header):
+        """Поля модели для колонок файла и недостающие поля,
+        которые заполняются значениями по умолчанию.
+        """
+        fields = [model._meta.get_field(name) for name in header]
+        missing = [
+            field for field in model._meta.concrete_fields
+            if field not in fields and not field.primary_key
+        ]
+        return fields, missing
+
+    def get_insert_sql(self, model, fields, missing, upsert):
+        """INSERT для строк файла. В режиме upsert строка с существующим
+        первичным ключом обновляется, только если изменились данные из
+        файла; поля, заполненные значениями по умолчанию, не меняются.
+        """
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            table,
+            ', '.join(quote(field.column) for field in fields + missing),
+            ', '.join(['%s'] * len(fields + missing)),
+        )
+        if not upsert:
+            return sql
+        if connection.vendor not in UPSERT_DISTINCT:
+            raise CommandError(
+                f'Режим --upsert не поддерживается для {connection.vendor}'
+            )
+        pk = model._meta.pk
+        if pk not in fields:
+            raise CommandError(
+                f'Для режима --upsert в файле нужна колонка {pk.name}'
+            )
+        columns = [quote(field.column) for field in fields if field != pk]
+        if not columns:
+            return f'{sql} ON CONFLICT ({quote(pk.column)}) DO NOTHING'
+        distinct = UPSERT_DISTINCT[connection.vendor]
+        return '{} ON CONFLICT ({}) DO UPDATE SET {} WHERE {}'.format(
+            sql,
+            quote(pk.column),
+            ', '.join(f'{column} = excluded.{column}' for column in columns),
+            ' OR '.join(
+                f'{table}.{column} {distinct} excluded.{column}'
+                for column in columns
+            ),
+        )
+
+    def insert_rows(self, cursor, sql, rows, batch_size):
+        changed = 0
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[start:start + batch_size])
+            changed += max(cursor.rowcount, 0)
+        return changed
+
+    def prepare_chunks(self, file_csv, model, chunksize, offset=0):
+        """Читает файл и превращает каждую часть в строки для вставки."""
+        for header, raw_rows in self.read_chunks(file_csv, chunksize, offset):
+            fields, missing = self.get_columns(model, header)
+            converters = [get_converter(field) for field in fields]
+            defaults = [get_field_default(field) for field in missing]
+            rows = [
+                [
+                    convert(value)
+                    for convert, value in zip(converters, raw_row)
+                ] + defaults
+                for raw_row in raw_rows
+            ]
+            yield fields, missing, rows
+
+    def load_file(self, model, chunks, batch_size, upsert):
+        rows_count = changed = 0
+        with connection.cursor() as cursor:
+            for fields, missing, rows in chunks:
+                sql = self.get_insert_sql(model, fields, missing, upsert)
+                changed += self.insert_rows(cursor, sql, rows, batch_size)
+                rows_count += len(rows)
+        return rows_count, changed
+
+    def reset_sequences(self, loaded_models):
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), loaded_models
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
     def handle(self, *args, **kwargs):
-        con = sqlite3.connect('db.sqlite3')
-        for file_csv, table in DICT_TABLE.items():
-            df = pd.read_csv(os.path.join(CSV_DIR, file_csv), delimiter=',')
+        chunksize = kwargs.get('chunksize')
+        batch_size = kwargs.get('batch_size') or 1000
+        upsert = kwargs.get('upsert', False)
+        incremental = kwargs.get('incremental', False)
+        self.engine = kwargs.get('engine') or 'csv'
+        order = sort_by_dependencies(settings.DICT_TABLE, get_table_models())
+        plan = self.plan_files(order, incremental)
+        # Файлы читаются по одному: разбор упирается в GIL, а в
+        # пуле процессов передача готовых строк обратно дороже самого
+        # разбора, и одновременно в памяти оказались бы все файлы.
+        if kwargs.get('validate', True):
+            self.validate_plan(plan, chunksize, upsert)
+        with self.bulk_context(plan, kwargs.get('bulk')):
+            self.load_plan(plan, chunksize, batch_size, upsert)
+
+    def bulk_context(self, plan, enabled):
+        if not enabled:
+            return nullcontext()
+        if connection.vendor != 'sqlite':
+            raise CommandError('Режим --bulk доступен только для SQLite')
+        return bulk_load(
+            connection, [model._meta.db_table for _, model, *_ in plan]
+        )
+
+    def validate_plan(self, plan, chunksize, upsert):
+        """Проверяет все файлы до записи в БД. Файлы проверяются в
+        порядке загрузки, поэтому ссылки сверяются и с записями БД,
+        и с ключами уже проверенных файлов. Проверка - отдельный проход
+        разбора всех файлов, он занимает примерно столько же, сколько
+        разбор при загрузке.
+        """
+        known_keys = KnownKeys(
+            field.related_model
+            for _, model, *_ in plan
+            for field in model._meta.concrete_fields
+            if field.is_relation
+        )
+        failed = []
+        validation_started = time.monotonic()
+        for file_csv, model, offset, _, known in plan:
+            started = time.monotonic()
+            validator = FileValidator(model, known_keys, not upsert, known)
+            chunks = self.prepare_chunks(file_csv, model, chunksize, offset)
+            for fields, _, rows in chunks:
+                validator.check(fields, rows)
+            errors = validator.finish()
+            elapsed = time.monotonic() - started
+            if not errors:
+                logging.info(
+                    f'Файл {file_csv} проверен: {validator.rows} строк '
+                    f'за {elapsed:.2f} с'
+                )
+                continue
+            failed.append(file_csv)
+            logging.error(
+                f'Файл {file_csv} не прошел проверку:\n' + '\n'.join(errors)
+            )
+        if failed:
+            raise CommandError(
+                f'Загрузка отменена, ошибки в файлах: {", ".join(failed)}'
+            )
+        logging.info(
+            'Проверка файлов (отдельный проход разбора) заняла '
+            f'{time.monotonic() - validation_started:.2f} с; '
+            'отключить проверку: --no-validate'
+        )
+
+    @transaction.atomic
+    def load_plan(self, plan, chunksize, batch_size, upsert):
+        loaded_models = []
+        for file_csv, model, offset, fingerprint, known in plan:
+            table = model._meta.db_table
+            started = time.monotonic()
+            chunks = self.prepare_chunks(file_csv, model, chunksize, offset)
             try:
-                df.to_sql(table, con=con, if_exists='append', index=False)
-                logging.info(f'Загружен файл {file_csv} в таблицу {table}')
-            except sqlite3.IntegrityError as e:
-                if 'not null' in e.args[0].lower():
-                    logging.error(f'Данные содержат значения NULL {file_csv}')
-                elif 'unique constraint' in e.args[0].lower():
-                    logging.error('Вы пытаетесь загрузить данные с '
-                                  f'одинаковыми ID в таблицу {table}. '
-                                  'Убедитесь, что не произвели загрузку '
-                                  'данных из файлов csc ранее.')
-                else:
-                    raise
-        con.commit()
-        con.close()
+                with transaction.atomic():
+                    rows, changed = self.load_file(
+                        model, chunks, batch_size, upsert
+                    )
+                    self.save_manifest(file_csv, fingerprint, known + rows)
+            except IntegrityError as e:
+                self.report_integrity_error(e, file_csv, table)
+                continue
+            loaded_models.append(model)
+            elapsed = time.monotonic() - started
+            logging.info(
+                f'Загружен файл {file_csv} в таблицу {table}: '
+                f'{rows} строк, добавлено или изменено {changed} '
+                f'за {elapsed:.2f} с ({rows / max(elapsed, 1e-6):.0f} строк/с)'
+            )
+        self.reset_sequences(loaded_models)
+        self.update_derived_data(loaded_models)
+
+    def update_derived_data(self, loaded_models):
+        """Сигналы моделей при загрузке не срабатывают, поэтому
+        производные данные пересчитываются одним проходом в конце,
+        а кешированные ответы API по загруженным моделям сбрасываются.
+        """
+        changed = set(loaded_models)
+        if {Title, Review} & changed:
+            updated = Title.objects.update_rating()
+            logging.info(f'Пересчитан рейтинг произведений: {updated}')
+            changed.add(Title)
+        transaction.on_commit(lambda: invalidate(*changed))
+
+    def report_integrity_error(self, error, file_csv, table):
+        message = str(error).lower()
+        if 'not null' in message:
+            logging.error(f'Данные содержат значения NULL {file_csv}')
+        elif 'unique constraint' in message:
+            logging.error('Вы пытаетесь загрузить данные с '
+                          f'одинаковыми ID в таблицу {table}. '
+                          'Убедитесь, что не произвели загрузку '
+                          'данных из файлов csc ранее, или запустите '
+                          'команду с ключом --upsert.')
+        else:
+            raise error
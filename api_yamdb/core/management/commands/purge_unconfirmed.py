@@ -0,0 +1,66 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import User
+
+FORMATTER = '%(asctime)s — %(levelname)s — %(message)s'
+
+logging.basicConfig(
+    level=logging.INFO,
+    format=FORMATTER
+)
+
+
+class Command(BaseCommand):
+    """Удаляет пользователей, которые зарегистрировались через signup,
+    но так и не получили токен по коду подтверждения.
+    Удаление идет пачками, каждая пачка в своей короткой транзакции,
+    чтобы не держать блокировку записи SQLite.
+    """
+    help = 'Удаление неподтвержденных регистраций старше заданного возраста'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=7,
+            help='Возраст регистрации в днях, после которого она удаляется'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество пользователей, удаляемых в одной транзакции'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пачками в секундах'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        stale = User.objects.filter(
+            last_login__isnull=True,
+            date_joined__lt=cutoff,
+            is_staff=False,
+            is_superuser=False,
+        ).exclude(confirmation_code='').order_by('pk')
+        batch_size = options['batch_size']
+        deleted = 0
+        started = time.monotonic()
+        while True:
+            ids = list(stale.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                stale.filter(pk__in=ids).delete()
+            deleted += len(ids)
+            if len(ids) < batch_size:
+                break
+            time.sleep(options['pause'])
+        elapsed = time.monotonic() - started
+        logging.info(
+            f'Удалено неподтвержденных пользователей: {deleted} '
+            f'за {elapsed:.2f} с ({deleted / max(elapsed, 1e-6):.0f} строк/с)'
+        )
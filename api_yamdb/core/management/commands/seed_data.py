@@ -0,0 +1,327 @@
+import logging
+import random
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from core.cache import invalidate
+from core.sqlite import bulk_load
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from users.models import User
+
+FORMATTER = '%(asctime)s — %(levelname)s — %(message)s'
+
+logging.basicConfig(
+    level=logging.INFO,
+    format=FORMATTER
+)
+
+# Даты отсчитываются от постоянной точки, чтобы данные не зависели
+# от дня запуска.
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+PERIOD_SECONDS = 3 * 365 * 24 * 3600
+
+WORDS = (
+    'тихий', 'дом', 'море', 'ночь', 'город', 'путь', 'сад', 'зима',
+    'свет', 'огонь', 'ветер', 'песня', 'река', 'лес', 'звезда', 'время',
+)
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса рангов 1..count по закону Ципфа: первый
+    элемент самый популярный.
+    """
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def allocate(total, cum_weights, limit):
+    """Распределяет total по элементам пропорционально весам, не
+    больше limit на элемент. Излишек сверх limit делится между
+    остальными элементами, а единицы, потерянные при округлении вниз,
+    получают элементы с наибольшей дробной частью, поэтому сумма
+    всегда равна total. Нужно total <= limit * len(cum_weights).
+    """
+    weights = [
+        cumulative - previous
+        for previous, cumulative in zip([0.0] + cum_weights, cum_weights)
+    ]
+    counts = [0] * len(weights)
+    free = list(range(len(weights)))
+    remaining = total
+    while free:
+        weight = sum(weights[index] for index in free)
+        capped = [
+            index for index in free
+            if remaining * weights[index] / weight >= limit
+        ]
+        if not capped:
+            break
+        for index in capped:
+            counts[index] = limit
+        remaining -= limit * len(capped)
+        free = [index for index in free if counts[index] < limit]
+    if not free:
+        return counts
+    shares = {index: remaining * weights[index] / weight for index in free}
+    for index, share in shares.items():
+        counts[index] = int(share)
+    rest = remaining - sum(counts[index] for index in free)
+    for index in sorted(
+        free, key=lambda index: shares[index] - counts[index], reverse=True
+    )[:rest]:
+        counts[index] += 1
+    return counts
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    """Заполняет пустую БД синтетическими данными для нагрузочного
+    тестирования. Популярность произведений подчиняется закону Ципфа:
+    у первых произведений большая часть отзывов, а комментарии
+    достаются отзывам популярных произведений. Жанры произведения
+    берутся из соседних жанров, поэтому сочетания жанров повторяются.
+    Одинаковые параметры и --seed дают одинаковые данные.
+    Строки вставляются пачками через executemany в одной транзакции.
+    """
+    help = 'Генерация синтетических данных для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=40)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель распределения популярности произведений'
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Количество строк в одном executemany'
+        )
+        parser.add_argument(
+            '--bulk', action='store_true',
+            help='Только для SQLite: вторичные индексы создаются после '
+                 'вставки, PRAGMA ослабляются на время загрузки'
+        )
+
+    def handle(self, *args, **options):
+        self.models = (
+            User, Category, Genre, Title, GenreTitle, Review, Comment
+        )
+        for model in self.models:
+            if model.objects.exists():
+                raise CommandError(
+                    f'Таблица {model._meta.db_table} не пуста: '
+                    'seed_data заполняет только пустую БД'
+                )
+        if options['bulk'] and connection.vendor != 'sqlite':
+            raise CommandError('Ключ --bulk поддерживается только для SQLite')
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        tables = [model._meta.db_table for model in self.models]
+        context = (
+            bulk_load(connection, tables) if options['bulk'] else nullcontext()
+        )
+        started = time.monotonic()
+        with context:
+            self.seed(options)
+        logging.info(
+            f'Данные созданы за {time.monotonic() - started:.2f} с'
+        )
+
+    @transaction.atomic
+    def seed(self, options):
+        users = options['users']
+        titles = options['titles']
+        if options['reviews'] > titles * users:
+            raise CommandError(
+                f'Отзывов не может быть больше {titles * users}: у автора '
+                'не больше одного отзыва на произведение'
+            )
+        popularity = zipf_weights(titles, options['zipf'])
+        self.insert(User, self.user_rows(users))
+        self.insert(Category, (
+            (number, f'Категория {number}', f'category-{number}')
+            for number in range(1, options['categories'] + 1)
+        ))
+        self.insert(Genre, (
+            (number, f'Жанр {number}', f'genre-{number}')
+            for number in range(1, options['genres'] + 1)
+        ))
+        quality = [self.random.gauss(7, 1.5) for _ in range(titles)]
+        self.insert(Title, self.title_rows(titles, options['categories']))
+        self.insert(GenreTitle, self.genre_title_rows(
+            titles, options['genres']
+        ))
+        self.reviews_per_title = allocate(
+            options['reviews'], popularity, users
+        )
+        self.insert(Review, self.review_rows(
+            self.reviews_per_title, quality, users
+        ))
+        self.insert(Comment, self.comment_rows(
+            options['comments'], self.reviews_per_title, users
+        ))
+        self.reset_sequences()
+        self.update_rating()
+        transaction.on_commit(lambda: invalidate(*self.models))
+
+    def date(self):
+        return connection.ops.adapt_datetimefield_value(
+            EPOCH + timedelta(seconds=self.random.randrange(PERIOD_SECONDS))
+        )
+
+    def text(self, words):
+        return ' '.join(self.random.choices(WORDS, k=words)).capitalize()
+
+    def user_rows(self, users):
+        for number in range(1, users + 1):
+            role = 'moderator' if number % 500 == 0 else 'user'
+            yield (
+                number, '!', False, f'user{number}', '', '',
+                f'user{number}@yamdb.fake', False, True, self.date(), '',
+                '', role
+            )
+
+    def title_rows(self, titles, categories):
+        for number in range(1, titles + 1):
+            yield (
+                number, f'{self.text(2)} {number}',
+                self.random.randint(1950, 2023), self.text(12),
+                self.random.randint(1, categories), None
+            )
+
+    def genre_title_rows(self, titles, genres):
+        """Основной жанр популярен по закону Ципфа, дополнительные -
+        соседние с ним.
+        """
+        genre_weights = zipf_weights(genres, 1.0)
+        pk = 0
+        for title in range(1, titles + 1):
+            main = self.random.choices(
+                range(genres), cum_weights=genre_weights
+            )[0]
+            extra = self.random.choices((0, 1, 2), weights=(5, 3, 2))[0]
+            for offset in range(extra + 1):
+                pk += 1
+                yield pk, title, (main + offset) % genres + 1
+
+    def review_rows(self, reviews_per_title, quality, users):
+        """Авторы отзывов на одно произведение не повторяются:
+        ограничение unique_author_title. Суммы оценок запоминаются
+        для рейтинга.
+        """
+        self.score_sums = []
+        pk = 0
+        for title, count in enumerate(reviews_per_title):
+            authors = self.random.sample(range(1, users + 1), count)
+            total = 0
+            for author in authors:
+                pk += 1
+                score = min(10, max(1, round(
+                    self.random.gauss(quality[title], 2)
+                )))
+                total += score
+                yield (
+                    pk, title + 1, self.text(20), author, score, self.date()
+                )
+            self.score_sums.append(total)
+
+    def comment_rows(self, comments, reviews_per_title, users):
+        """Произведение выбирается пропорционально числу его отзывов,
+        то есть по популярности; отзыв - случайно среди отзывов
+        произведения (они идут подряд). Накопленные веса считаются
+        один раз, произведения выбираются пачками.
+        """
+        first_review = [0] + list(accumulate(reviews_per_title))
+        if not comments or not first_review[-1]:
+            return
+        titles = range(len(reviews_per_title))
+        pk = 0
+        while pk < comments:
+            block = self.random.choices(
+                titles, cum_weights=first_review[1:],
+                k=min(self.batch_size, comments - pk)
+            )
+            for title in block:
+                pk += 1
+                review = first_review[title] + self.random.randrange(
+                    reviews_per_title[title]
+                ) + 1
+                yield (
+                    pk, review, self.text(10),
+                    self.random.randint(1, users), self.date()
+                )
+
+    def insert(self, model, rows):
+        fields = [
+            field for field in model._meta.concrete_fields
+            if field.attname != 'last_login'
+        ]
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(model._meta.db_table),
+            ', '.join(
+                connection.ops.quote_name(field.column) for field in fields
+            ),
+            ', '.join(['%s'] * len(fields))
+        )
+        started = time.monotonic()
+        inserted = 0
+        with connection.cursor() as cursor:
+            for batch in batched(rows, self.batch_size):
+                cursor.executemany(sql, batch)
+                inserted += len(batch)
+        elapsed = time.monotonic() - started
+        logging.info(
+            f'{model._meta.db_table}: {inserted} строк за {elapsed:.2f} с '
+            f'({inserted / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+
+    def update_rating(self):
+        """Рейтинг считается по сгенерированным оценкам так же, как
+        в TitleQuerySet.update_rating: целая часть средней оценки.
+        Коррелированный подзапрос без индексов (--bulk) был бы
+        слишком медленным.
+        """
+        sql = 'UPDATE {} SET {} = %s WHERE {} = %s'.format(
+            connection.ops.quote_name(Title._meta.db_table),
+            connection.ops.quote_name(Title._meta.get_field('rating').column),
+            connection.ops.quote_name(Title._meta.pk.column)
+        )
+        rows = [
+            (int(total / count), title)
+            for title, (total, count) in enumerate(
+                zip(self.score_sums, self.reviews_per_title), start=1
+            )
+            if count
+        ]
+        with connection.cursor() as cursor:
+            for batch in batched(rows, self.batch_size):
+                cursor.executemany(sql, batch)
+        logging.info(f'Пересчитан рейтинг произведений: {len(rows)}')
+
+    def reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), self.models
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
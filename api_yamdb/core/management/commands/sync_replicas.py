@@ -0,0 +1,55 @@
+import logging
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+FORMATTER = '%(asctime)s — %(levelname)s — %(message)s'
+
+logging.basicConfig(
+    level=logging.INFO,
+    format=FORMATTER
+)
+
+
+class Command(BaseCommand):
+    """Копирует основную базу SQLite в файлы реплик для чтения.
+    Используется online backup API SQLite: копия согласована, а запись
+    в основную базу во время копирования не блокируется надолго.
+    Для проверки реплик на одной машине команду можно запускать
+    по расписанию, например раз в несколько секунд.
+    """
+    help = 'Копирование основной базы SQLite в реплики для чтения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Файлы реплик; по умолчанию базы из READ_REPLICAS'
+        )
+        parser.add_argument(
+            '--pages', type=int, default=1024,
+            help='Количество страниц, копируемых за один шаг'
+        )
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Копирование реплик поддерживается для SQLite')
+        paths = options['paths'] or [
+            connections[alias].settings_dict['NAME']
+            for alias in settings.READ_REPLICAS
+        ]
+        source.ensure_connection()
+        for path in paths:
+            started = time.monotonic()
+            target = sqlite3.connect(path)
+            try:
+                source.connection.backup(target, pages=options['pages'])
+            finally:
+                target.close()
+            logging.info(
+                f'Реплика {path} обновлена '
+                f'за {time.monotonic() - started:.2f} с'
+            )
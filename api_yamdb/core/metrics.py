@@ -0,0 +1,282 @@
+"""Метрики запросов в памяти процесса.
+
+Задержки складываются в гистограммы с фиксированными границами
+корзин: запись - одно сложение под блокировкой, память не растет
+с числом запросов, а перцентили оцениваются по корзинам с точностью
+до их ширины (соседние границы отличаются на 25%).
+
+Счетчики и гистограммы для Prometheus собираются в registry и
+отдаются в текстовом формате представлением core.views.metrics.
+"""
+import threading
+from bisect import bisect_left
+
+from .writer import write_queue
+
+# Границы корзин в мс: от 0.5 мс до ~30 с.
+BUCKETS = tuple(round(0.5 * 1.25 ** number, 3) for number in range(50))
+
+
+class Histogram:
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        position = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[position] += 1
+            self.count += 1
+            self.sum += value
+
+    def percentile(self, share):
+        """Оценка перцентиля: линейная интерполяция внутри корзины."""
+        with self.lock:
+            counts, count = list(self.counts), self.count
+        if not count:
+            return None
+        rank = share * count
+        seen = 0
+        for position, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[position - 1] if position else 0.0
+                upper = (
+                    self.buckets[position] if position < len(self.buckets)
+                    else lower
+                )
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class ViewTimings:
+    """Гистограмма общего времени и суммы по этапам одного
+    представления.
+    """
+    stages = ('db', 'serialize', 'render')
+
+    def __init__(self):
+        self.total = Histogram()
+        self.lock = threading.Lock()
+        self.sums = dict.fromkeys(self.stages + ('queries',), 0.0)
+
+    def observe(self, total, **stages):
+        self.total.observe(total)
+        with self.lock:
+            for name, value in stages.items():
+                self.sums[name] += value
+
+    def summary(self):
+        count = self.total.count
+        summary = {
+            'count': count,
+            'mean': self.total.sum / count if count else None,
+            'p50': self.total.percentile(0.5),
+            'p95': self.total.percentile(0.95),
+            'p99': self.total.percentile(0.99),
+        }
+        with self.lock:
+            summary.update(
+                (f'mean_{name}', value / count if count else None)
+                for name, value in self.sums.items()
+            )
+        return summary
+
+
+class TimingRegistry:
+
+    def __init__(self):
+        self.views = {}
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        timings = self.views.get(name)
+        if timings is None:
+            with self.lock:
+                timings = self.views.setdefault(name, ViewTimings())
+        return timings
+
+    def summary(self):
+        return {
+            name: timings.summary()
+            for name, timings in sorted(self.views.items())
+        }
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+
+timings = TimingRegistry()
+
+
+# Границы корзин гистограмм Prometheus в секундах.
+PROMETHEUS_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+         .replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def key(self, labels):
+        return tuple(labels[name] for name in self.labels)
+
+    def render(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.type}'
+        with self.lock:
+            values = list(self.values.items())
+        for key, value in sorted(values, key=lambda item: item[0]):
+            yield from self.render_value(key, value)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        if not self.labels:
+            self.values[()] = 0
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render_value(self, key, value):
+        yield f'{self.name}{format_labels(self.labels, key)} {value}'
+
+
+class PrometheusHistogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(),
+                 buckets=PROMETHEUS_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        histogram = self.values.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.values.setdefault(
+                    key, Histogram(self.buckets)
+                )
+        histogram.observe(value)
+
+    def render_value(self, key, histogram):
+        with histogram.lock:
+            counts, count = list(histogram.counts), histogram.count
+            total = histogram.sum
+        cumulative = 0
+        for bucket, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = format_labels(self.labels, key, [('le', bucket)])
+            yield f'{self.name}_bucket{labels} {cumulative}'
+        labels = format_labels(self.labels, key, [('le', '+Inf')])
+        yield f'{self.name}_bucket{labels} {count}'
+        labels = format_labels(self.labels, key)
+        yield f'{self.name}_sum{labels} {total}'
+        yield f'{self.name}_count{labels} {count}'
+
+
+class CallbackMetric(Metric):
+    """Значение, которое читается в момент выгрузки метрик."""
+
+    def __init__(self, name, documentation, type, callback):
+        super().__init__(name, documentation)
+        self.type = type
+        self.callback = callback
+
+    def render(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.type}'
+        yield f'{self.name} {self.callback()}'
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return '\n'.join(
+            line for metric in self.metrics for line in metric.render()
+        ) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    'yamdb_http_requests_total', 'Запросы к приложению.',
+    ('route', 'method', 'status')
+))
+http_request_duration = registry.register(PrometheusHistogram(
+    'yamdb_http_request_duration_seconds', 'Время обработки запроса.',
+    ('route', 'method')
+))
+db_query_duration = registry.register(PrometheusHistogram(
+    'yamdb_db_query_duration_seconds',
+    'Время запросов к БД из обработчиков запросов.'
+))
+# Ожидание блокировки в пределах busy_timeout SQLite выполняет внутри
+# запроса, и отдельно его не измерить: оно входит в время запроса
+# в yamdb_db_query_duration_seconds. Счетчик учитывает только запросы,
+# не дождавшиеся блокировки.
+db_lock_timeouts = registry.register(Counter(
+    'yamdb_db_lock_timeouts_total',
+    'Запросы к БД, не дождавшиеся снятия блокировки SQLite за '
+    'busy_timeout (ошибка database is locked).'
+))
+api_cache_requests = registry.register(Counter(
+    'yamdb_api_cache_requests_total',
+    'Обращения к кешу ответов API по результату (hit, miss).',
+    ('result',)
+))
+registry.register(CallbackMetric(
+    'yamdb_write_queue_depth', 'Задания в очереди записи.', 'gauge',
+    lambda: write_queue.depth
+))
+registry.register(CallbackMetric(
+    'yamdb_write_queue_jobs_total', 'Выполненные задания очереди записи.',
+    'counter', lambda: write_queue.jobs
+))
+registry.register(CallbackMetric(
+    'yamdb_write_queue_batches_total',
+    'Транзакции очереди записи (группы заданий).', 'counter',
+    lambda: write_queue.batches
+))
+registry.register(CallbackMetric(
+    'yamdb_write_queue_lock_retries_total',
+    'Повторы групп очереди записи из-за блокировки SQLite.', 'counter',
+    lambda: write_queue.retries
+))
@@ -0,0 +1,211 @@
+import hashlib
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
+
+from .metrics import (db_lock_timeouts, db_query_duration,
+                      http_request_duration, http_requests, timings)
+from .routers import choose_replica, set_read_database
+from .writer import is_locked_error
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def get_client_key(request):
+    """Клиент определяется по заголовку Authorization, анонимный -
+    по адресу. Сам токен не хранится, только его хеш.
+    """
+    credentials = request.META.get('HTTP_AUTHORIZATION') or (
+        request.META.get('REMOTE_ADDR', '')
+    )
+    digest = hashlib.sha256(credentials.encode()).hexdigest()
+    return f'replica-pin:{digest}'
+
+
+def get_view_path(view_func):
+    view = getattr(view_func, 'cls', view_func)
+    return f'{view.__module__}.{view.__qualname__}'
+
+
+class ReplicaMiddleware:
+    """Направляет чтение GET и HEAD запросов к представлениям из
+    READ_REPLICA_VIEWS на реплики из READ_REPLICAS.
+    После успешного запроса на запись клиент READ_YOUR_WRITES_WINDOW
+    секунд читает из основной базы и видит свои изменения, даже если
+    реплика еще не обновлена. Отметки хранятся в кеше Django: для
+    нескольких процессов нужен общий кеш.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        set_read_database(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            set_read_database(None)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            cache.set(
+                get_client_key(request), True,
+                settings.READ_YOUR_WRITES_WINDOW
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in SAFE_METHODS
+            and get_view_path(view_func) in settings.READ_REPLICA_VIEWS
+            and not cache.get(get_client_key(request))
+        ):
+            set_read_database(choose_replica())
+
+
+class BrowserMiddleware:
+    """Цепочка middleware из BROWSER_MIDDLEWARE (сессии, CSRF,
+    сообщения и т.д.), которая выполняется только для запросов вне
+    API_PREFIX: API аутентифицирует запросы по JWT и обходится без них.
+    Из хуков вложенных middleware поддерживается process_view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.middleware = []
+        handler = get_response
+        for path in reversed(settings.BROWSER_MIDDLEWARE):
+            middleware = import_string(path)(handler)
+            self.middleware.insert(0, middleware)
+            handler = convert_exception_to_response(middleware)
+        self.browser_handler = handler
+
+    def is_api(self, request):
+        return request.path_info.startswith(settings.API_PREFIX)
+
+    def __call__(self, request):
+        if self.is_api(request):
+            return self.get_response(request)
+        return self.browser_handler(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_api(request):
+            return None
+        for middleware in self.middleware:
+            if hasattr(middleware, 'process_view'):
+                response = middleware.process_view(
+                    request, view_func, view_args, view_kwargs
+                )
+                if response is not None:
+                    return response
+        return None
+
+
+class QueryTimer:
+    """Обертка execute_wrapper: время и число запросов к БД
+    для Server-Timing и метрик Prometheus.
+    """
+
+    def __init__(self):
+        self.duration = 0.0
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except Exception as error:
+            if is_locked_error(error):
+                db_lock_timeouts.inc()
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            db_query_duration.observe(duration)
+            self.duration += duration
+            self.queries += 1
+
+
+class RequestTimingMiddleware:
+    """Замеряет этапы запроса и отдает их в заголовке Server-Timing:
+    total - весь запрос, db - запросы к БД и их число,
+    serialize - код представления без БД (в API это в основном
+    сериализация), render - вывод ответа. Общее время складывается
+    в гистограмму представления в core.metrics.timings.
+    Записи через очередь core.writer выполняются в другом потоке
+    и в db не попадают.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        timer = QueryTimer()
+        request.timing = {'timer': timer}
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        total = (time.perf_counter() - started) * 1000
+        self.count_request(request, response, total)
+        stages = self.get_stages(request.timing, total)
+        response['Server-Timing'] = ', '.join(
+            [f'total;dur={total:.1f}']
+            + [
+                f'{name};dur={value:.1f}'
+                + (f';desc="{timer.queries} queries"' if name == 'db' else '')
+                for name, value in stages.items()
+            ]
+        )
+        view = request.timing.get('view')
+        if view is not None:
+            timings.get(view).observe(
+                total, queries=timer.queries, **stages
+            )
+        return response
+
+    def count_request(self, request, response, total):
+        # Адреса без совпадения в urls объединяются, чтобы случайные
+        # пути не порождали новые ряды метрик.
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        http_requests.inc(
+            route=route, method=request.method, status=response.status_code
+        )
+        http_request_duration.observe(
+            total / 1000, route=route, method=request.method
+        )
+
+    def get_stages(self, timing, total):
+        timer = timing['timer']
+        stages = {'db': timer.duration * 1000}
+        if 'view_end' in timing:
+            view_time = (timing['view_end'] - timing['view_start']) * 1000
+            db_in_view = (timing['view_db'] - timing['start_db']) * 1000
+            stages['serialize'] = max(view_time - db_in_view, 0.0)
+        if 'render_end' in timing:
+            stages['render'] = (
+                timing['render_end'] - timing['view_end']
+            ) * 1000
+        return stages
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        request.timing.update(
+            view=f'{request.method} {match.view_name if match else "-"}',
+            view_start=time.perf_counter(),
+            start_db=request.timing['timer'].duration,
+        )
+
+    def process_template_response(self, request, response):
+        timing = request.timing
+        timing['view_end'] = time.perf_counter()
+        timing['view_db'] = timing['timer'].duration
+
+        def render_finished(response):
+            timing['render_end'] = time.perf_counter()
+        response.add_post_render_callback(render_finished)
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportManifest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, unique=True, verbose_name='Файл')),
+                ('size', models.BigIntegerField(verbose_name='Размер')),
+                ('mtime_ns', models.BigIntegerField(verbose_name='Время изменения')),
+                ('sha256', models.CharField(max_length=64, verbose_name='Хеш')),
+                ('rows', models.PositiveIntegerField(verbose_name='Строк')),
+                ('imported_at', models.DateTimeField(auto_now=True, verbose_name='Загружен')),
+            ],
+            options={
+                'verbose_name': 'Загруженный файл',
+                'verbose_name_plural': 'Загруженные файлы',
+                'ordering': ('file_name',),
+            },
+        ),
+    ]
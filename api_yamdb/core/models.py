@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class ImportManifest(models.Model):
+    """Модель ImportManifest, в которой хранятся сведения о загруженных
+    командой import_csv файлах.
+    Содержит поля:
+    - file_name - имя файла из DICT_TABLE,
+    - size - размер загруженной части файла в байтах,
+    - mtime_ns - время изменения файла при загрузке,
+    - sha256 - хеш загруженной части файла,
+    - rows - количество загруженных строк,
+    - imported_at - дата и время последней загрузки
+    """
+    file_name = models.CharField(
+        verbose_name='Файл',
+        max_length=255,
+        unique=True
+    )
+    size = models.BigIntegerField(verbose_name='Размер')
+    mtime_ns = models.BigIntegerField(verbose_name='Время изменения')
+    sha256 = models.CharField(verbose_name='Хеш', max_length=64)
+    rows = models.PositiveIntegerField(verbose_name='Строк')
+    imported_at = models.DateTimeField(
+        verbose_name='Загружен',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Загруженный файл'
+        verbose_name_plural = 'Загруженные файлы'
+        ordering = ('file_name',)
+
+    def __str__(self):
+        return self.file_name
@@ -0,0 +1,184 @@
+"""Профилирование отдельного запроса по требованию администратора.
+
+Запрос администратора с заголовком X-Profile (PROFILING['HEADER'])
+выполняется под cProfile, а запросы к БД записываются в хронологию:
+начало от начала запроса, длительность, текст SQL без значений
+параметров и место вызова. Самые затратные функции и хронология
+сохраняются в кеше Django на TIMEOUT секунд под идентификатором
+из заголовка ответа X-Profile-Id; администратор получает их GET
+запросом на /api/v1/profiles/<id>/. Для нескольких процессов нужен
+общий кеш.
+
+Без заголовка middleware только проверяет его наличие. Заголовок
+от остальных пользователей не учитывается. Профилируется поток
+запроса: записи через очередь core.writer в профиль не попадают.
+"""
+import cProfile
+import logging
+import pstats
+import sys
+import time
+import traceback
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .querylog import get_origin
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'HEADER': 'HTTP_X_PROFILE',
+    'TOP': 30,
+    'MAX_QUERIES': 500,
+    'TIMEOUT': 3600,
+}
+
+
+def get_option(name):
+    return getattr(settings, 'PROFILING', {}).get(name, DEFAULTS[name])
+
+
+def get_profile_key(profile_id):
+    return f'request-profile:{profile_id}'
+
+
+def get_profile(profile_id):
+    return cache.get(get_profile_key(profile_id))
+
+
+def is_admin(request):
+    """DRF аутентифицирует запрос позже, в представлении, поэтому
+    JWT проверяется здесь.
+    """
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except APIException:
+        return False
+    if result is None:
+        return False
+    user = result[0]
+    return user.is_admin or user.is_superuser
+
+
+def get_stack():
+    """Кадры от ближайшего в виде кортежей: traceback.extract_stack
+    читает строки исходников и заметно исказил бы профиль.
+    """
+    stack = []
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_filename, frame.f_lineno, code.co_name))
+        frame = frame.f_back
+    return stack
+
+
+class QueryTimeline:
+    """Обертка execute_wrapper: хронология запросов к БД. Во время
+    запроса сохраняется только стек, место вызова определяется после.
+    Выключать профилировщик на время записи нельзя: disable()
+    завершает все открытые вызовы, и время внешних функций теряется.
+    """
+
+    def __init__(self, started, limit):
+        self.started = started
+        self.limit = limit
+        self.queries = []
+        self.total = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.total += 1
+            self.duration += duration
+            if len(self.queries) < self.limit:
+                self.queries.append({
+                    'start_ms': round((started - self.started) * 1000, 3),
+                    'duration_ms': round(duration * 1000, 3),
+                    'database': context['connection'].alias,
+                    'sql': sql,
+                    'origin': get_stack(),
+                })
+
+    def timeline(self):
+        for query in self.queries:
+            query['origin'] = get_origin([
+                traceback.FrameSummary(*frame, lookup_line=False)
+                for frame in query['origin']
+            ])
+        return self.queries
+
+
+def format_function(key):
+    filename, line, name = key
+    if filename == '~':
+        return name
+    return f'{filename}:{line}({name})'
+
+
+def get_top_functions(stats, sort, count):
+    stats.sort_stats(sort)
+    top = []
+    for key in stats.fcn_list[:count]:
+        primitive_calls, calls, internal, cumulative, _ = stats.stats[key]
+        top.append({
+            'function': format_function(key),
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'internal_ms': round(internal * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        })
+    return top
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if get_option('HEADER') not in request.META or not is_admin(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        timeline = QueryTimeline(started, get_option('MAX_QUERIES'))
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timeline))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        total = (time.perf_counter() - started) * 1000
+        profile_id = uuid.uuid4().hex
+        match = request.resolver_match
+        top = get_option('TOP')
+        stats = pstats.Stats(profiler)
+        cache.set(get_profile_key(profile_id), {
+            'id': profile_id,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total, 3),
+            'db_ms': round(timeline.duration * 1000, 3),
+            'queries_total': timeline.total,
+            'functions': get_top_functions(stats, 'cumulative', top),
+            'internal': get_top_functions(stats, 'tottime', top),
+            'queries': timeline.timeline(),
+        }, get_option('TIMEOUT'))
+        logger.info('Профиль запроса %s %s сохранен: %s',
+                    request.method, request.get_full_path(), profile_id)
+        response['X-Profile-Id'] = profile_id
+        return response
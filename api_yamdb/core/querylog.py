@@ -0,0 +1,171 @@
+"""Поиск N+1 и медленных запросов к БД во время разработки и тестов.
+
+QueryInspectionMiddleware подключает к соединениям запроса обертку
+QueryLog через connection.execute_wrapper. Запросы группируются
+по отпечатку - тексту SQL без значений, - и если запрос одной формы
+повторяется в пределах HTTP-запроса REPEAT_THRESHOLD раз и более,
+это отмечается как N+1 с местом вызова в коде проекта. Запросы дольше
+SLOW_QUERY_MS записываются в журнал с местом вызова. Превышение
+бюджета запросов из QUERY_BUDGETS (ключ - метод и имя адреса, как
+в статистике задержек: 'GET api:titles-list') тоже отмечается.
+
+Настройки в QUERY_INSPECTION; по умолчанию проверка выключена.
+При RECORD нарушения сохраняются в violations - так тесты проваливают
+прогон при превышении бюджета.
+"""
+import logging
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'REPEAT_THRESHOLD': 5,
+    'SLOW_QUERY_MS': 100,
+    'RECORD': False,
+}
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+SPACES = re.compile(r'\s+')
+
+# Кадры оберток execute_wrapper в месте вызова не учитываются.
+INSTRUMENTATION = {
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'middleware.py'),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiling.py'),
+}
+ORM_PATH = os.path.join(os.sep, 'django', 'db', '')
+
+violations = []
+
+
+def get_option(name):
+    return getattr(settings, 'QUERY_INSPECTION', {}).get(
+        name, DEFAULTS[name]
+    )
+
+
+def fingerprint(sql):
+    """Форма запроса: значения и списки параметров IN заменены."""
+    sql = LITERALS.sub('?', sql)
+    sql = PLACEHOLDER_LISTS.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def format_frame(frame):
+    return f'{frame.filename}:{frame.lineno} в {frame.name}'
+
+
+def get_origin(stack=None):
+    """Место вызова запроса: ближайший кадр в коде проекта и, если
+    он дальше, ближайший кадр вне ORM (например, поле сериализатора,
+    которое обращается к связанному объекту). stack - кадры от
+    ближайшего, по умолчанию текущий стек.
+    """
+    if stack is None:
+        stack = reversed(traceback.extract_stack())
+    frames = [
+        frame for frame in stack
+        if os.path.abspath(frame.filename) not in INSTRUMENTATION
+    ]
+    caller = next((
+        frame for frame in frames
+        if ORM_PATH not in os.path.abspath(frame.filename)
+    ), None)
+    project = next((
+        frame for frame in frames
+        if os.path.abspath(frame.filename).startswith(settings.BASE_DIR)
+        and 'site-packages' not in frame.filename
+    ), None)
+    origin = [format_frame(frame) for frame in (project, caller) if frame]
+    if len(origin) == 2 and origin[0] == origin[1]:
+        origin.pop()
+    return ' <- '.join(origin) or 'неизвестно'
+
+
+class QueryLog:
+
+    def __init__(self, repeat_threshold, slow_query_ms):
+        self.repeat_threshold = repeat_threshold
+        self.slow_query_ms = slow_query_ms
+        self.counts = Counter()
+        self.origins = {}
+        self.slow = []
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            shape = fingerprint(sql)
+            self.counts[shape] += 1
+            # Стек разбирается только для запросов, о которых сообщим.
+            if self.counts[shape] == self.repeat_threshold:
+                self.origins[shape] = get_origin()
+            if duration >= self.slow_query_ms:
+                self.slow.append((duration, sql, get_origin()))
+
+    def repeated(self):
+        return [
+            (shape, count, self.origins[shape])
+            for shape, count in self.counts.most_common()
+            if count >= self.repeat_threshold
+        ]
+
+
+class QueryInspectionMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_option('ENABLED'):
+            return self.get_response(request)
+        log = QueryLog(
+            get_option('REPEAT_THRESHOLD'), get_option('SLOW_QUERY_MS')
+        )
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            response = self.get_response(request)
+        self.report(request, log)
+        return response
+
+    def report(self, request, log):
+        target = f'{request.method} {request.path}'
+        for duration, sql, origin in log.slow:
+            logger.warning(
+                f'Медленный запрос {duration:.1f} мс ({target}), '
+                f'{origin}: {sql}'
+            )
+        problems = [
+            f'N+1: {count} запросов одной формы ({target}), {origin}: {shape}'
+            for shape, count, origin in log.repeated()
+        ]
+        match = request.resolver_match
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(
+            f'{request.method} {match.view_name if match else "-"}'
+        )
+        if budget is not None and log.total > budget:
+            problems.append(
+                f'Превышен бюджет запросов ({target}): '
+                f'{log.total} при бюджете {budget}'
+            )
+        for problem in problems:
+            logger.warning(problem)
+        if get_option('RECORD'):
+            violations.extend(problems)
@@ -0,0 +1,47 @@
+"""Ускоренный вывод JSON через orjson.
+
+orjson - необязательная зависимость: без нее, а также для отступов,
+которые запрашивает клиент или BrowsableAPIRenderer, работает обычный
+JSONRenderer DRF. Результат совпадает с выводом JSONRenderer: UTF-8
+без экранирования, компактные разделители, экранированные \\u2028
+и \\u2029.
+"""
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+else:
+    # Даты и ключи словарей не строками выводятся как в JSONEncoder.
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+LINE_SEPARATORS = (
+    (b'\xe2\x80\xa8', b'\\u2028'),
+    (b'\xe2\x80\xa9', b'\\u2029'),
+)
+
+
+def default(value):
+    """Типы, которых не знает orjson (Decimal, ленивые строки
+    перевода, UUID и т.д.), приводятся так же, как в JSONEncoder DRF.
+    """
+    return JSONEncoder().default(value)
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or not self.compact or (
+            self.ensure_ascii
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        rendered = orjson.dumps(data, default=default, option=OPTIONS)
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in rendered:
+                rendered = rendered.replace(separator, escaped)
+        return rendered
@@ -0,0 +1,54 @@
+"""Маршрутизация чтения на реплики базы.
+
+ReplicaMiddleware решает для каждого запроса, можно ли читать
+с реплики, и сохраняет решение в состоянии потока; ReadReplicaRouter
+направляет чтение по этому решению. Вне запросов (команды, очередь
+записи) и для запросов, не отмеченных middleware, используется
+основная база.
+
+Пользователи и остальные данные аутентификации всегда читаются из
+основной базы: новый пользователь получает токен до того, как
+sync_replicas скопирует его на реплики, и проверка JWT по реплике
+отвечала бы 401.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+state = threading.local()
+
+
+def get_read_database():
+    return getattr(state, 'database', None)
+
+
+def set_read_database(database):
+    state.database = database
+
+
+def choose_replica():
+    replicas = getattr(settings, 'READ_REPLICAS', ())
+    return random.choice(replicas) if replicas else None
+
+
+class ReadReplicaRouter:
+    """Чтение с реплики, выбранной для текущего запроса, запись
+    и миграции только в основную базу: реплики - ее копии.
+    """
+    primary_apps = ('auth', 'contenttypes', 'sessions', 'users')
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in self.primary_apps:
+            return None
+        return get_read_database()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'READ_REPLICAS', ())
@@ -0,0 +1,64 @@
+from django.core.signals import request_started
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate
+from .sqlite import apply_pragmas
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Настройка каждого нового соединения с SQLite."""
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection)
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """Проверка постоянных соединений перед повторным использованием.
+    Django 2.2 проверяет соединение только после ошибки в нем, поэтому
+    при CONN_MAX_AGE оборванное сервером БД соединение приводило бы
+    к ошибке первого запроса. Включается ключом CONN_HEALTH_CHECKS
+    в настройках базы, как в новых версиях Django.
+    """
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not connection.in_atomic_block
+            and not connection.is_usable()
+        ):
+            connection.close()
+
+
+# Поля, изменение которых не влияет на ответы API: вход пользователя
+# сохраняет только last_login.
+IGNORED_FIELDS = frozenset({'last_login'})
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    """Новая версия модели для кеша ответов API после фиксации
+    транзакции: иначе параллельный запрос успел бы закешировать данные
+    до изменения под новой версией. Для связей многие ко многим
+    sender - промежуточная модель.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields and update_fields <= IGNORED_FIELDS:
+        return
+    if kwargs.get('action', 'post_').startswith('post_'):
+        transaction.on_commit(
+            lambda: invalidate(sender), using=kwargs.get('using')
+        )
+
+
+def connect_cache_invalidation(models):
+    """Подключает сброс кеша только для моделей, от которых зависят
+    кешируемые ответы: обработчик post_delete отключает быстрое
+    удаление модели, и каскадно удаляемые строки загружались бы
+    в память и удалялись по одной.
+    """
+    for model in models:
+        for signal in (post_save, post_delete, m2m_changed):
+            signal.connect(invalidate_cached_responses, sender=model)
@@ -0,0 +1,73 @@
+"""Настройки SQLite: PRAGMA новых соединений и режим массовой
+загрузки данных.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Значения PRAGMA на время загрузки: журнал в памяти (откат к точкам
+# сохранения работает, но сбой во время загрузки может повредить базу),
+# без fsync и с большим кешем страниц для перестроения индексов.
+BULK_PRAGMAS = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'cache_size': -256 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def apply_pragmas(connection, pragmas=None):
+    """Выставляет PRAGMA из settings.SQLITE_PRAGMAS новому соединению.
+    journal_mode = WAL сохраняется в файле базы, остальные значения
+    действуют только в пределах соединения.
+    """
+    if pragmas is None:
+        pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+def get_secondary_indexes(cursor, tables):
+    """Неуникальные индексы таблиц, которые можно удалить на время
+    загрузки и создать заново: имя индекса и его SQL.
+    """
+    indexes = []
+    for table in tables:
+        cursor.execute(f'PRAGMA index_list("{table}")')
+        names = {row[1] for row in cursor.fetchall() if not row[2]}
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL",
+            [table]
+        )
+        indexes.extend(
+            (name, sql) for name, sql in cursor.fetchall() if name in names
+        )
+    return indexes
+
+
+@contextmanager
+def bulk_load(connection, tables):
+    """Удаляет вторичные индексы таблиц и ослабляет PRAGMA на время
+    загрузки. По выходе индексы создаются заново, выполняется ANALYZE
+    и восстанавливаются прежние значения PRAGMA.
+    Вызывается вне транзакции: journal_mode нельзя менять внутри нее.
+    """
+    with connection.cursor() as cursor:
+        saved = {}
+        for pragma, value in BULK_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma}')
+            saved[pragma] = cursor.fetchone()[0]
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+        indexes = get_secondary_indexes(cursor, tables)
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+        try:
+            yield indexes
+        finally:
+            for _, sql in indexes:
+                cursor.execute(sql)
+            cursor.execute('ANALYZE')
+            for pragma, value in saved.items():
+                cursor.execute(f'PRAGMA {pragma} = {value}')
@@ -0,0 +1,212 @@
+"""Проверка данных файла до записи в БД.
+
+Проверки выполняются по колонкам части файла, а не построчно:
+валидаторы поля вызываются один раз для каждого различного значения
+колонки, ссылки и ключи сверяются множествами, а в БД отправляется
+по одному запросу на пачку значений.
+"""
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from core.ingest import InvalidValue
+
+# Ограничение числа параметров в одном запросе к SQLite.
+QUERY_BATCH = 500
+
+
+def valid_values(column):
+    """Различные значения колонки без пустых и неразобранных."""
+    return {
+        value for value in column
+        if value is not None and not isinstance(value, InvalidValue)
+    }
+
+
+def batched(values, size=QUERY_BATCH):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class KnownKeys:
+    """Значения первичных ключей, которые уже есть в БД или в
+    проверенных ранее файлах текущей загрузки. Ключи файла хранятся,
+    только если на его модель ссылаются файлы загрузки: ключи
+    комментариев не нужны никому, а их могут быть десятки миллионов.
+    """
+
+    def __init__(self, referenced):
+        self.referenced = set(referenced)
+        self.keys = {}
+
+    def add(self, model, values):
+        if model not in self.referenced:
+            return
+        known = self.keys.get(model)
+        if known is None:
+            self.keys[model] = values
+        else:
+            known.update(values)
+
+    def missing(self, model, values):
+        known = self.keys.setdefault(model, set())
+        unknown = set(values) - known
+        for batch in batched(unknown):
+            found = model._default_manager.filter(
+                pk__in=batch
+            ).values_list('pk', flat=True)
+            known.update(found)
+        return unknown - known
+
+
+class FileValidator:
+    """Собирает ошибки одного файла по мере проверки его частей.
+    Номера строк в сообщениях считаются от начала файла: при
+    дозагрузке start - число строк, загруженных ранее.
+    """
+    max_examples = 5
+
+    def __init__(self, model, known_keys, check_existing, start=0):
+        self.model = model
+        self.known_keys = known_keys
+        self.check_existing = check_existing
+        self.start = start
+        self.errors = []
+        self.rows = 0
+        self.seen = {}
+
+    def error(self, field, positions, column, message):
+        examples = ', '.join(
+            f'строка {self.start + self.rows + position + 1} '
+            f'({field.name}={column[position]!r})'
+            for position in positions[:self.max_examples]
+        )
+        more = len(positions) - self.max_examples
+        if more > 0:
+            examples += f' и еще {more}'
+        self.errors.append(f'{message}: {examples}')
+
+    def positions(self, column, bad):
+        return [
+            position for position, value in enumerate(column)
+            if value in bad
+        ]
+
+    def check(self, fields, rows):
+        columns = dict(zip(fields, zip(*rows))) if rows else {}
+        for field, column in columns.items():
+            self.check_converted(field, column)
+            self.check_nulls(field, column)
+            self.check_validators(field, column)
+            if field.is_relation:
+                self.check_references(field, column)
+            if field.primary_key or field.unique:
+                self.check_unique(field, column)
+        self.check_unique_together(columns)
+        self.rows += len(rows)
+
+    def check_converted(self, field, column):
+        positions = [
+            position for position, value in enumerate(column)
+            if isinstance(value, InvalidValue)
+        ]
+        if positions:
+            self.error(
+                field, positions, column, 'Значение неверного типа'
+            )
+
+    def check_nulls(self, field, column):
+        if field.null or field.primary_key:
+            return
+        positions = self.positions(column, {None})
+        if positions:
+            self.error(field, positions, column, 'Пустое значение')
+
+    def check_validators(self, field, column):
+        if not field.validators:
+            return
+        bad = {}
+        for value in valid_values(column) - {''}:
+            try:
+                for validator in field.validators:
+                    validator(value)
+            except ValidationError as error:
+                bad[value] = '; '.join(error.messages)
+        for value, message in bad.items():
+            self.error(
+                field, self.positions(column, {value}), column, message
+            )
+
+    def check_references(self, field, column):
+        missing = self.known_keys.missing(
+            field.related_model, valid_values(column)
+        )
+        if missing:
+            self.error(
+                field, self.positions(column, missing), column,
+                'Ссылка на несуществующую запись '
+                f'{field.related_model._meta.db_table}'
+            )
+
+    def check_unique(self, field, column):
+        seen = self.seen.setdefault(field, set())
+        duplicates = set()
+        for value in column:
+            if value in seen:
+                duplicates.add(value)
+            seen.add(value)
+        duplicates.discard(None)
+        if duplicates:
+            self.error(
+                field, self.positions(column, duplicates), column,
+                'Повторяющееся значение в файле'
+            )
+        if not self.check_existing:
+            return
+        existing = set()
+        for batch in batched(valid_values(column)):
+            existing.update(self.model._default_manager.filter(
+                **{f'{field.attname}__in': batch}
+            ).values_list(field.attname, flat=True))
+        if existing:
+            self.error(
+                field, self.positions(column, existing), column,
+                'Значение уже есть в БД'
+            )
+
+    def check_unique_together(self, columns):
+        for constraint in self.model._meta.constraints:
+            if not isinstance(constraint, models.UniqueConstraint) or (
+                constraint.condition is not None
+            ):
+                continue
+            fields = [
+                self.model._meta.get_field(name)
+                for name in constraint.fields
+            ]
+            if not all(field in columns for field in fields):
+                continue
+            combined = list(zip(*(columns[field] for field in fields)))
+            seen = self.seen.setdefault(constraint.name, set())
+            positions = []
+            for position, value in enumerate(combined):
+                if value in seen:
+                    positions.append(position)
+                seen.add(value)
+            if positions:
+                self.error(
+                    fields[0], positions, columns[fields[0]],
+                    f'Нарушено ограничение {constraint.name}'
+                )
+
+    def finish(self):
+        """Множество первичных ключей файла, собранное для поиска
+        повторов, передается следующим файлам без копирования,
+        остальные множества освобождаются. None и неразобранные
+        значения в нем не совпадают ни с одной ссылкой.
+        """
+        self.known_keys.add(
+            self.model, self.seen.pop(self.model._meta.pk, set())
+        )
+        self.seen = {}
+        return self.errors
@@ -0,0 +1,41 @@
+import hmac
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from .metrics import registry
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def is_metrics_client(request):
+    """Доступ по адресу из METRICS_ALLOWED_NETWORKS или по токену
+    METRICS_TOKEN в заголовке Authorization: Bearer.
+    """
+    token = settings.METRICS_TOKEN
+    # Сравнение за постоянное время: по времени ответа нельзя
+    # подбирать токен посимвольно. Строки сравниваются байтами:
+    # строки с не-ASCII символами compare_digest не принимает.
+    if token and hmac.compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', '').encode(),
+        f'Bearer {token}'.encode()
+    ):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+@require_GET
+def metrics(request):
+    """Метрики процесса в текстовом формате Prometheus."""
+    if not is_metrics_client(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
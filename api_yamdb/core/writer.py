@@ -0,0 +1,169 @@
+"""Очередь записи в БД: один пишущий поток на процесс.
+
+SQLite допускает только одну пишущую транзакцию, поэтому одновременные
+запросы на запись из потоков процесса не конкурируют за блокировку,
+а передаются в очередь. Поток записи забирает из нее все накопившиеся
+задания и выполняет их в одной транзакции, каждое в своей точке
+сохранения: несколько мелких записей фиксируются одним fsync.
+Если база занята другим процессом ("database is locked"), транзакция
+откатывается и вся группа повторяется с растущей паузой.
+
+Включается настройкой WRITE_QUEUE['ENABLED']; при выключенной очереди
+run() просто вызывает функцию.
+"""
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'BATCH_SIZE': 50,
+    'WINDOW': 0.002,
+    'RETRIES': 8,
+    'BACKOFF': 0.01,
+}
+
+
+def get_option(name):
+    return getattr(settings, 'WRITE_QUEUE', {}).get(name, DEFAULTS[name])
+
+
+def is_locked_error(error):
+    """SQLITE_BUSY и SQLITE_LOCKED (блокировка таблицы в общем кеше)."""
+    return isinstance(error, OperationalError) and 'locked' in str(error)
+
+
+class Job:
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.result = None
+        self.error = None
+
+    def execute(self):
+        self.result, self.error = None, None
+        try:
+            with transaction.atomic():
+                self.result = self.func(*self.args, **self.kwargs)
+        except Exception as error:
+            if is_locked_error(error):
+                raise
+            self.error = error
+
+    def resolve(self):
+        if self.error is not None:
+            self.future.set_exception(self.error)
+        else:
+            self.future.set_result(self.result)
+
+
+class WriteQueue:
+    """Очередь заданий и поток, который их выполняет. Поток создается
+    при первом задании в каждом процессе, в том числе после fork.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queue = None
+        self.thread = None
+        self.pid = None
+        self.jobs = 0
+        self.batches = 0
+        self.retries = 0
+
+    @property
+    def depth(self):
+        return self.queue.qsize() if self.queue is not None else 0
+
+    def start(self):
+        with self.lock:
+            if self.pid == os.getpid() and self.thread.is_alive():
+                return
+            self.queue = queue.Queue()
+            self.pid = os.getpid()
+            self.thread = threading.Thread(
+                target=self.work, name='write-queue', daemon=True
+            )
+            self.thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        if self.pid != os.getpid() or not self.thread.is_alive():
+            self.start()
+        job = Job(func, args, kwargs)
+        self.queue.put(job)
+        return job.future
+
+    def take(self):
+        """Первое задание и все, что поступят за время WINDOW."""
+        jobs = [self.queue.get()]
+        deadline = time.monotonic() + get_option('WINDOW')
+        while len(jobs) < get_option('BATCH_SIZE'):
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    jobs.append(self.queue.get(timeout=timeout))
+                else:
+                    jobs.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return jobs
+
+    def commit(self, jobs):
+        """Выполняет группу заданий в одной транзакции, повторяя ее,
+        пока база занята.
+        """
+        for attempt in range(get_option('RETRIES') + 1):
+            try:
+                with transaction.atomic():
+                    for job in jobs:
+                        job.execute()
+                return None
+            except Exception as error:
+                if not is_locked_error(error):
+                    return error
+                if attempt == get_option('RETRIES'):
+                    return error
+                self.retries += 1
+                pause = get_option('BACKOFF') * 2 ** attempt
+                time.sleep(pause * random.uniform(0.5, 1.5))
+
+    def work(self):
+        while True:
+            jobs = self.take()
+            error = self.commit(jobs)
+            if error is not None:
+                logger.error('Группа из %s записей не выполнена: %s',
+                             len(jobs), error)
+                for job in jobs:
+                    job.error = error
+            for job in jobs:
+                job.resolve()
+            self.jobs += len(jobs)
+            self.batches += 1
+            connection.close_if_unusable_or_obsolete()
+
+
+write_queue = WriteQueue()
+
+
+def run(func, *args, **kwargs):
+    """Выполняет функцию записи в потоке очереди и возвращает ее
+    результат или поднимает ее исключение. Внутри открытой транзакции
+    вызывающего потока функция выполняется сразу: у потока очереди
+    свое соединение, и он ждал бы завершения этой транзакции.
+    """
+    if not get_option('ENABLED') or connection.in_atomic_block:
+        return func(*args, **kwargs)
+    return write_queue.submit(func, *args, **kwargs).result()
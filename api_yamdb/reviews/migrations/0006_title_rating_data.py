@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import Avg, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    average = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title').annotate(
+        rating=Cast(Avg('score'), IntegerField())
+    ).values('rating')
+    Title.objects.update(rating=Subquery(average))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_rating'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
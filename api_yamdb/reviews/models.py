@@ -1,5 +1,7 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Avg, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Cast
 
 from users.models import User
 from .validators import validate_year
@@ -55,6 +57,20 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def update_rating(self):
+        """Пересчитывает рейтинг всех произведений выборки одним
+        запросом UPDATE. Рейтинг - целая часть средней оценки.
+        """
+        average = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title').annotate(
+            rating=Cast(Avg('score'), IntegerField())
+        ).values('rating')
+        return self.update(rating=Subquery(average))
+
+
 class Title(models.Model):
     """Модель Title, в которой хранятся данные произведения.
     Содержит поля:
@@ -62,7 +78,8 @@ class Title(models.Model):
     - year - Дата выхода,
     - description - Описание произведения,
     - genre - Жанр,
-    - category - Категория
+    - category - Категория,
+    - rating - Рейтинг, пересчитывается при изменении отзывов
     """
     name = models.CharField(
         verbose_name='Название',
@@ -94,6 +111,8 @@ class Title(models.Model):
         default=None
     )
 
+    objects = TitleQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
@@ -0,0 +1,44 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Review, Title
+
+# Произведения, рейтинг которых нужно пересчитать после фиксации
+# текущей транзакции, по псевдонимам баз.
+pending = threading.local()
+
+
+def get_pending_titles(using):
+    if not hasattr(pending, 'titles'):
+        pending.titles = {}
+    return pending.titles.setdefault(using, set())
+
+
+def update_pending_ratings(using):
+    """Один UPDATE на все произведения, отзывы которых изменились
+    в транзакции. Удаленные вместе с отзывами произведения в выборку
+    не попадают. Обработчик регистрируется на каждый отзыв, поэтому
+    следующие вызовы застают пустое множество. После отката в нем
+    могут остаться произведения, их рейтинг просто пересчитается
+    лишний раз со следующей транзакцией.
+    """
+    titles = get_pending_titles(using)
+    if not titles:
+        return
+    title_ids = list(titles)
+    titles.clear()
+    Title.objects.using(using).filter(pk__in=title_ids).update_rating()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def update_title_rating(sender, instance, using, **kwargs):
+    """Пересчет рейтинга произведения после изменения его отзывов.
+    Каскадное удаление произведения удаляет отзывы по одному, поэтому
+    пересчет откладывается до фиксации транзакции.
+    """
+    get_pending_titles(using).add(instance.title_id)
+    transaction.on_commit(lambda: update_pending_ratings(using), using=using)
@@ -0,0 +1,63 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:53
+
+from django.db import IntegrityError, migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def find_duplicate_emails(User):
+    """Учетные записи, email которых совпадает без учета регистра:
+    {email в нижнем регистре: [(id, username, email), ...]}.
+    """
+    duplicates = (
+        User.objects.exclude(email='').annotate(normalized=Lower('email'))
+        .order_by().values('normalized').annotate(accounts=Count('pk'))
+        .filter(accounts__gt=1).values_list('normalized', flat=True)
+    )
+    conflicts = {}
+    for pk, username, email, normalized in (
+        User.objects.annotate(normalized=Lower('email'))
+        .filter(normalized__in=list(duplicates)).order_by('normalized', 'pk')
+        .values_list('pk', 'username', 'email', 'normalized')
+    ):
+        conflicts.setdefault(normalized, []).append((pk, username, email))
+    return conflicts
+
+
+def normalize_emails(apps, schema_editor):
+    """Дубликаты email нельзя объединить автоматически: за каждой
+    учетной записью свои отзывы и комментарии. Миграция прерывается
+    со списком конфликтующих учетных записей, email нужно исправить
+    вручную и повторить migrate.
+    """
+    User = apps.get_model('users', 'User')
+    conflicts = find_duplicate_emails(User)
+    if conflicts:
+        raise IntegrityError(
+            'Email нескольких пользователей совпадает без учета регистра, '
+            'уникальный индекс по email создать нельзя. Измените email '
+            'у всех учетных записей, кроме одной, и повторите migrate:\n'
+            + '\n'.join(
+                f'{normalized}: ' + ', '.join(
+                    f'id={pk} {username} <{email}>'
+                    for pk, username, email in accounts
+                )
+                for normalized, accounts in conflicts.items()
+            )
+        )
+    User.objects.update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_first_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(condition=models.Q(_negated=True, email=''), fields=('email',), name='unique_normalized_email'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import F
+
+
+def mark_confirmed(apps, schema_editor):
+    """До появления purge_unconfirmed обмен кода на токен не заполнял
+    last_login, поэтому подтвержденные ранее пользователи неотличимы
+    от брошенных регистраций. Все существующие учетные записи с кодом
+    считаются подтвержденными на дату регистрации.
+    """
+    User = apps.get_model('users', 'User')
+    User.objects.filter(last_login__isnull=True).exclude(
+        confirmation_code=''
+    ).update(last_login=F('date_joined'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_normalized_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_confirmed, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Q
 
 
 class User(AbstractUser):
@@ -22,6 +23,13 @@ class User(AbstractUser):
         'Роль', max_length=50, choices=ROLES, default='user'
     )
 
+    def save(self, *args, **kwargs):
+        """Email хранится в нижнем регистре: уникальный индекс по нему
+        работает как регистронезависимый.
+        """
+        self.email = self.email.lower()
+        super().save(*args, **kwargs)
+
     @property
     def is_admin(self):
         return self.role == self.ADMIN_ROLE
@@ -37,5 +45,9 @@ class User(AbstractUser):
         constraints = [
             models.UniqueConstraint(
                 fields=['username', 'email'], name='unique_user_email'
-            )
+            ),
+            models.UniqueConstraint(
+                fields=['email'], condition=~Q(email=''),
+                name='unique_normalized_email'
+            ),
         ]
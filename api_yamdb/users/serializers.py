@@ -1,10 +1,56 @@
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db.models import Q
 from rest_framework import serializers
 
 from reviews.models import User
 
 
-class UserRoleSerializer(serializers.ModelSerializer):
+class UniqueUsernameEmailMixin:
+    """Проверка уникальности username и email одним запросом к БД.
+    Email хранится в нормализованном (нижнем) регистре, поэтому поиск
+    использует уникальный индекс по колонке email.
+    """
+
+    def validate(self, data):
+        data = super().validate(data)
+        username = data.get('username')
+        email = data.get('email')
+        lookup = Q()
+        if username is not None:
+            lookup |= Q(username=username)
+        if email is not None:
+            lookup |= Q(email=email)
+        if not lookup:
+            return data
+        taken = User.objects.filter(lookup).order_by()
+        if self.instance is not None:
+            taken = taken.exclude(pk=self.instance.pk)
+        errors = {}
+        for taken_username, taken_email in taken.values_list(
+            'username', 'email'
+        ):
+            if username is not None and taken_username == username:
+                errors['username'] = [
+                    'Пользователь с таким username уже существует.'
+                ]
+            if email is not None and taken_email == email:
+                errors['email'] = [
+                    'Пользователь с таким email уже существует.'
+                ]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return data
+
+
+class UserRoleSerializer(
+    UniqueUsernameEmailMixin, serializers.ModelSerializer
+):
     """Сериализатор ролей пользователей."""
+    email = serializers.EmailField(required=True)
+    username = serializers.CharField(
+        max_length=150, validators=[UnicodeUsernameValidator()]
+    )
+
     class Meta:
         model = User
         fields = (
@@ -12,8 +58,11 @@ class UserRoleSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('role',)
 
+    def validate_email(self, value):
+        return value.lower()
+
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(UniqueUsernameEmailMixin, serializers.ModelSerializer):
     """Сериализатор пользователей."""
     email = serializers.EmailField(required=True)
     username = serializers.CharField(required=True)
@@ -25,24 +74,17 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
     def validate_email(self, value):
-        email = value.lower()
-        if User.objects.filter(email=email).exists():
-            raise serializers.ValidationError(
-                'Пользователь с таким email уже существует.'
-            )
-        return email
+        return value.lower()
 
-    def validate_username(self, value):
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError(
-                'Пользователь с таким username уже существует.'
-            )
-        return value
 
-
-class CredentialsSerializer(serializers.ModelSerializer):
+class CredentialsSerializer(
+    UniqueUsernameEmailMixin, serializers.ModelSerializer
+):
     """Сериализатор учетных данных."""
     email = serializers.EmailField(required=True)
+    username = serializers.CharField(
+        max_length=150, validators=[UnicodeUsernameValidator()]
+    )
 
     class Meta:
         model = User
@@ -50,12 +92,7 @@ class CredentialsSerializer(serializers.ModelSerializer):
         extra_kwargs = {'password': {'required': False}}
 
     def validate_email(self, value):
-        email = value.lower()
-        if User.objects.filter(email=email).exists():
-            raise serializers.ValidationError(
-                'Пользователь с таким email уже существует.'
-            )
-        return email
+        return value.lower()
 
     def validate_username(self, value):
         username_me = value.lower()
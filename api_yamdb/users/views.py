@@ -33,8 +33,9 @@ class UsersViewSet(viewsets.ModelViewSet):
         """Обработка эндпоинта users/me. Запрос и возможность
         редактирования информации профиля пользователя.
         """
-        user = User.objects.get(username=request.user)
-        serializer = UserRoleSerializer(user, data=request.data, partial=True)
+        serializer = UserRoleSerializer(
+            request.user, data=request.data, partial=True
+        )
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,475 @@
+"""Производительность адресов API на синтетических данных (seed_data):
+задержка (p50, p95), пропускная способность одного клиента и число
+запросов к БД для каждого сценария - списки, объекты, фильтры,
+вложенные отзывы и комментарии, регистрация и токены, запись.
+
+Каждый адрес из api/urls.py должен быть покрыт хотя бы одним
+сценарием, иначе прогон завершается ошибкой. Результаты сравниваются
+с базовой линией из endpoints_baseline.json; превышение порогов
+(THRESHOLDS или ключи командной строки) - код выхода 1. Кеш ответов
+API по умолчанию выключен, чтобы измерялись представления и запросы
+к БД, а не попадания в кеш. Запуск из корня репозитория:
+
+    python benchmarks/endpoints.py              # сравнить с базовой линией
+    python benchmarks/endpoints.py --save       # записать базовую линию
+
+Каждый сценарий замеряется в нескольких дочерних процессах
+(--processes) на своей копии данных, в итоге - медиана по процессам:
+скорость отдельного процесса заметно колеблется от запуска к запуску.
+Задержки зависят от машины: базовую линию записывают на той же
+машине, на которой затем проверяют изменения.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT, 'api_yamdb')
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'endpoints_baseline.json')
+
+# Допустимое ухудшение относительно базовой линии: доля для времени
+# процессора и задержки p50, число для запросов к БД. Рост времени
+# меньше FLOOR_MS считается шумом. Время процессора на запрос почти
+# не зависит от соседних процессов, поэтому порог для него строже,
+# чем для задержки; пропускная способность только выводится.
+THRESHOLDS = {
+    'cpu': 0.25,
+    'latency': 0.5,
+    'queries': 0,
+    'floor_ms': 0.5,
+}
+
+DATA = {
+    'titles': 1000,
+    'users': 1000,
+    'reviews': 20000,
+    'comments': 50000,
+    'genres': 40,
+    'categories': 10,
+    'seed': 1,
+}
+
+
+def setup(db_dir):
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ['DB_NAME'] = os.path.join(db_dir, 'db.sqlite3')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+
+    django.setup()
+
+
+def prepare(data):
+    """Заполняет временную базу и возвращает объекты для сценариев."""
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from users.models import User
+
+    call_command('migrate', verbosity=0)
+    call_command('seed_data', bulk=True, **data)
+    admin = User.objects.create(
+        username='bench-admin', email='bench-admin@yamdb.fake',
+        role='admin', confirmation_code='bench'
+    )
+    user = User.objects.get(pk=2)
+    user.confirmation_code = 'bench'
+    user.save(update_fields=['confirmation_code'])
+    return {
+        'admin': f'Bearer {RefreshToken.for_user(admin).access_token}',
+        'user': user,
+        'refresh': str(RefreshToken.for_user(user)),
+    }
+
+
+def create_objects(model, prefix):
+    """Объекты для сценариев удаления: по одному на повтор."""
+    def create(count):
+        model.objects.bulk_create(
+            model(name=f'{prefix} {number}', slug=f'{prefix}-{number}')
+            for number in range(count)
+        )
+    return create
+
+
+def get_cases(context):
+    """Сценарии: адрес (имя в пространстве api), параметры адреса,
+    GET параметры или тело запроса, заголовки. Параметры и тело могут быть
+    функциями номера повтора - для записей, которые нельзя повторять.
+    Отзыв 1 относится к произведению 1, самому популярному.
+    """
+    from reviews.models import Category, Genre
+
+    admin = context['admin']
+    user = context['user']
+    title = {'title_id': 1}
+    review = {'title_id': 1, 'review_id': 1}
+    return [
+        {'name': 'root', 'route': 'api-root', 'auth': admin},
+        {'name': 'categories', 'route': 'categories-list'},
+        {'name': 'categories?search', 'route': 'categories-list',
+         'params': {'search': 'Категория 1'}},
+        {'name': 'genres', 'route': 'genres-list'},
+        {'name': 'genres?search', 'route': 'genres-list',
+         'params': {'search': 'Жанр 2'}},
+        {'name': 'titles', 'route': 'titles-list'},
+        {'name': 'titles?page', 'route': 'titles-list',
+         'params': {'page': 50}},
+        {'name': 'titles?genre', 'route': 'titles-list',
+         'params': {'genre': 'genre-1'}},
+        {'name': 'titles?category', 'route': 'titles-list',
+         'params': {'category': 'category-3'}},
+        {'name': 'titles?year', 'route': 'titles-list',
+         'params': {'year': 2000}},
+        {'name': 'titles?name', 'route': 'titles-list',
+         'params': {'name': 'море'}},
+        {'name': 'title', 'route': 'titles-detail', 'kwargs': {'pk': 1}},
+        {'name': 'reviews', 'route': 'reviews-list', 'kwargs': title},
+        {'name': 'reviews?page', 'route': 'reviews-list', 'kwargs': title,
+         'params': {'page': 20}},
+        {'name': 'review', 'route': 'reviews-detail',
+         'kwargs': {**title, 'pk': 1}},
+        {'name': 'comments', 'route': 'comments-list', 'kwargs': review},
+        {'name': 'comment', 'route': 'comments-detail',
+         'kwargs': {**review, 'pk': context['comment']}},
+        {'name': 'users', 'route': 'users-list', 'auth': admin},
+        {'name': 'users?search', 'route': 'users-list', 'auth': admin,
+         'params': {'search': user.username}},
+        {'name': 'user', 'route': 'users-detail', 'auth': admin,
+         'kwargs': {'username': user.username}},
+        {'name': 'users/me', 'route': 'users-me-user', 'auth': admin},
+        {'name': 'timings', 'route': 'timings', 'auth': admin},
+        {'name': 'titles X-Profile', 'route': 'titles-list', 'auth': admin,
+         'headers': {'HTTP_X_PROFILE': '1'}},
+        {'name': 'profile', 'route': 'profile', 'auth': admin,
+         'kwargs': {'profile_id': context['profile']}},
+        {'name': 'signup', 'route': 'signup', 'method': 'post',
+         'data': lambda number: {
+             'username': f'bench{number}',
+             'email': f'bench{number}@yamdb.fake',
+         }},
+        {'name': 'token', 'route': 'token_obtain_pair', 'method': 'post',
+         'data': {'username': user.username, 'confirmation_code': 'bench'}},
+        {'name': 'token/refresh', 'route': 'token_refresh', 'method': 'post',
+         'data': {'refresh': context['refresh']}},
+        {'name': 'users/me PATCH', 'route': 'users-me-user',
+         'method': 'patch', 'auth': admin, 'data': {'bio': 'Тест'}},
+        {'name': 'title PATCH', 'route': 'titles-detail', 'method': 'patch',
+         'auth': admin, 'kwargs': {'pk': 1}, 'data': {'year': 2001}},
+        {'name': 'review POST', 'route': 'reviews-list', 'method': 'post',
+         'auth': admin, 'kwargs': lambda number: {'title_id': number + 1},
+         'data': {'text': 'Отзыв', 'score': 7}},
+        {'name': 'comment POST', 'route': 'comments-list', 'method': 'post',
+         'auth': admin, 'kwargs': review, 'data': {'text': 'Комментарий'}},
+        {'name': 'category DELETE', 'route': 'categories-detail',
+         'method': 'delete', 'auth': admin,
+         'create': create_objects(Category, 'bench'),
+         'kwargs': lambda number: {'slug': f'bench-{number}'}},
+        {'name': 'genre DELETE', 'route': 'genres-detail',
+         'method': 'delete', 'auth': admin,
+         'create': create_objects(Genre, 'bench'),
+         'kwargs': lambda number: {'slug': f'bench-{number}'}},
+    ]
+
+
+def get_routes(patterns=None, namespace=''):
+    """Имена всех адресов пространства api, включая вложенные."""
+    from django.urls import URLResolver, get_resolver
+
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    routes = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            nested = namespace
+            if pattern.namespace:
+                nested = f'{namespace}{pattern.namespace}:'
+            routes |= get_routes(pattern.url_patterns, nested)
+        elif pattern.name and namespace == 'api:':
+            routes.add(pattern.name)
+    return routes
+
+
+def resolve(value, number):
+    return value(number) if callable(value) else value
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def median(values):
+    return percentile(values, 0.5)
+
+
+class Measurement:
+    """Замеры одного сценария. Раунды сценариев чередуются: медленный
+    период машины приходится на один раунд каждого сценария, а не на
+    все раунды одного.
+    """
+
+    def __init__(self, client, case):
+        self.client = client
+        self.case = case
+        self.method = case.get('method', 'get')
+        self.headers = {}
+        if 'auth' in case:
+            self.headers['HTTP_AUTHORIZATION'] = case['auth']
+        self.headers.update(case.get('headers', {}))
+        self.number = 0
+        self.rounds = []
+
+    def request(self):
+        from django.db import connection
+        from django.urls import reverse
+
+        case = self.case
+        path = reverse(
+            f'api:{case["route"]}',
+            kwargs=resolve(case.get('kwargs', {}), self.number)
+        )
+        if self.method == 'get':
+            arguments = {'data': resolve(case.get('params', {}), self.number)}
+        else:
+            arguments = {
+                'data': json.dumps(resolve(case.get('data', {}), self.number)),
+                'content_type': 'application/json',
+            }
+        self.number += 1
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        with connection.execute_wrapper(count):
+            response = getattr(self.client, self.method)(
+                path, **arguments, **self.headers
+            )
+        cpu = time.process_time() - cpu_started
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            sys.exit(f'{case["name"]}: {self.method.upper()} {path} вернул '
+                     f'{response.status_code}: '
+                     f'{response.content.decode()[:200]}')
+        return elapsed, cpu, queries
+
+    def run(self, iterations, record=True):
+        samples = [self.request() for _ in range(iterations)]
+        if record:
+            self.rounds.append(samples)
+
+    def summary(self):
+        """p50 и пропускная способность - медианы по раундам, время
+        процессора - наименьшая по раундам медиана.
+        """
+        latencies = [
+            [elapsed for elapsed, _, _ in samples] for samples in self.rounds
+        ]
+        return {
+            'route': self.case['route'],
+            'method': self.method.upper(),
+            'p50_ms': round(median(
+                [median(values) for values in latencies]
+            ) * 1000, 3),
+            'p95_ms': round(percentile(
+                [elapsed for values in latencies for elapsed in values], 0.95
+            ) * 1000, 3),
+            'rps': round(median(
+                [len(values) / sum(values) for values in latencies]
+            ), 1),
+            'cpu_ms': round(min(
+                median([cpu for _, cpu, _ in samples])
+                for samples in self.rounds
+            ) * 1000, 3),
+            'queries': max(
+                queries for samples in self.rounds for _, _, queries in samples
+            ),
+        }
+
+
+def compare(results, baseline, thresholds):
+    """Список регрессий относительно базовой линии."""
+    def exceeds(value, base, share):
+        return value > max(base * (1 + share), base + thresholds['floor_ms'])
+
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries'] + thresholds['queries']:
+            regressions.append(
+                f'{name}: запросов к БД {result["queries"]}, '
+                f'в базовой линии {base["queries"]}'
+            )
+        if exceeds(result['cpu_ms'], base['cpu_ms'], thresholds['cpu']):
+            regressions.append(
+                f'{name}: время процессора {result["cpu_ms"]:.2f} мс, '
+                f'в базовой линии {base["cpu_ms"]:.2f} мс'
+            )
+        if exceeds(result['p50_ms'], base['p50_ms'], thresholds['latency']):
+            regressions.append(
+                f'{name}: p50 {result["p50_ms"]:.2f} мс, '
+                f'в базовой линии {base["p50_ms"]:.2f} мс'
+            )
+    return regressions
+
+
+def report(results, baseline):
+    print(f'{"сценарий":<20}{"метод":<8}{"p50, мс":>10}{"p95, мс":>10}'
+          f'{"запросов/с":>12}{"ЦП, мс":>9}{"SQL":>6}'
+          f'{"ЦП было":>10}{"SQL было":>10}')
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        print(f'{name:<20}{result["method"]:<8}{result["p50_ms"]:>10.2f}'
+              f'{result["p95_ms"]:>10.2f}{result["rps"]:>12.0f}'
+              f'{result["cpu_ms"]:>9.2f}{result["queries"]:>6}'
+              f'{base.get("cpu_ms", float("nan")):>10.2f}'
+              f'{base.get("queries", "-"):>10}')
+
+
+def measure(args, data, total):
+    """Выполняется в дочернем процессе: заполняет временную базу
+    и замеряет сценарии.
+    """
+    with tempfile.TemporaryDirectory() as db_dir:
+        setup(db_dir)
+        from django.conf import settings
+        from django.test import Client
+        from reviews.models import Comment
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        if args.cache:
+            settings.API_CACHE_TIMEOUT = 60
+        context = prepare(data)
+        context['comment'] = Comment.objects.filter(review_id=1).first().pk
+        client = Client(HTTP_ACCEPT='application/json')
+        context['profile'] = client.get(
+            '/api/v1/titles/', HTTP_AUTHORIZATION=context['admin'],
+            HTTP_X_PROFILE='1'
+        )['X-Profile-Id']
+        cases = get_cases(context)
+        missing = get_routes() - {case['route'] for case in cases}
+        if missing:
+            sys.exit('Нет сценариев для адресов: '
+                     f'{", ".join(sorted(missing))}')
+        measurements = []
+        for case in cases:
+            if args.only and args.only not in case['name']:
+                continue
+            if 'create' in case:
+                case['create'](total)
+            measurement = Measurement(client, case)
+            measurement.run(args.warmup, record=False)
+            measurements.append(measurement)
+        for _ in range(args.rounds):
+            for measurement in measurements:
+                measurement.run(args.iterations)
+        return {
+            measurement.case['name']: measurement.summary()
+            for measurement in measurements
+        }
+
+
+def run(args):
+    """Замеры в args.processes дочерних процессах по очереди."""
+    runs = []
+    for _ in range(args.processes):
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', *sys.argv[1:]],
+            check=True, stdout=subprocess.PIPE, universal_newlines=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    results = {}
+    for name, first in runs[0].items():
+        values = [result[name] for result in runs]
+        results[name] = {
+            'route': first['route'],
+            'method': first['method'],
+            **{
+                key: median([value[key] for value in values])
+                for key in ('p50_ms', 'p95_ms', 'rps', 'cpu_ms')
+            },
+            'queries': max(value['queries'] for value in values),
+        }
+    return results
+
+
+def load_baseline(path, data):
+    if not os.path.exists(path):
+        return {'results': {}, 'thresholds': {}}
+    with open(path, encoding='utf-8') as file:
+        saved = json.load(file)
+    if saved['data'] != data:
+        sys.exit(f'Базовая линия записана на других данных: {saved["data"]}')
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true',
+                        help='Записать результаты как базовую линию')
+    parser.add_argument('--only', help='Только сценарии с этой подстрокой')
+    parser.add_argument('--iterations', type=int, default=40)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--processes', type=int, default=3)
+    parser.add_argument('--child', action='store_true')
+    parser.add_argument('--cache', action='store_true',
+                        help='Включить кеш ответов API на 60 с')
+    for name, value in THRESHOLDS.items():
+        parser.add_argument(f'--{name.replace("_", "-")}-threshold',
+                            dest=name, type=type(value))
+    for name, value in DATA.items():
+        parser.add_argument(f'--{name}', type=int, default=value)
+    args = parser.parse_args()
+    data = {name: getattr(args, name) for name in DATA}
+    total = args.warmup + args.iterations * args.rounds
+    if total > args.titles:
+        parser.error('Сценарий review POST пишет по одному отзыву на '
+                     'произведение: нужно --titles не меньше '
+                     '--warmup + --iterations * --rounds')
+    if args.child:
+        print(json.dumps(measure(args, data, total)))
+        return
+    saved = {'results': {}, 'thresholds': {}}
+    if not args.save:
+        saved = load_baseline(args.baseline, data)
+    thresholds = {**THRESHOLDS, **saved['thresholds']}
+    thresholds.update({
+        name: getattr(args, name) for name in THRESHOLDS
+        if getattr(args, name) is not None
+    })
+    results = run(args)
+    report(results, saved['results'])
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(
+                {'data': data, 'thresholds': thresholds, 'results': results},
+                file, ensure_ascii=False, indent=2
+            )
+            file.write('\n')
+        print(f'Базовая линия записана в {args.baseline}')
+        return
+    regressions = compare(results, saved['results'], thresholds)
+    if regressions:
+        print('\nРегрессии:', *regressions, sep='\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Сравнение движков import_csv: время запуска команды, время загрузки
+и пиковое потребление памяти (RSS).
+
+Каждый замер выполняется в отдельном процессе на новой базе SQLite.
+Запуск из корня репозитория:
+
+    python benchmarks/import_csv.py --titles 5000 --reviews 200000
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT, 'api_yamdb')
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def generate(csv_dir, titles, users, reviews, comments, seed):
+    """Набор файлов в формате static/data."""
+    rnd = random.Random(seed)
+    pub_date = '2019-09-24T21:08:21.567Z'
+    write_csv(
+        os.path.join(csv_dir, 'category.csv'), ('id', 'name', 'slug'),
+        ((i, f'Категория {i}', f'category-{i}') for i in range(1, 11))
+    )
+    write_csv(
+        os.path.join(csv_dir, 'genre.csv'), ('id', 'name', 'slug'),
+        ((i, f'Жанр {i}', f'genre-{i}') for i in range(1, 31))
+    )
+    write_csv(
+        os.path.join(csv_dir, 'users.csv'),
+        ('id', 'username', 'email', 'role', 'bio', 'first_name',
+         'last_name'),
+        ((i, f'user{i}', f'user{i}@yamdb.fake', 'user', '', '', '')
+         for i in range(1, users + 1))
+    )
+    write_csv(
+        os.path.join(csv_dir, 'titles.csv'),
+        ('id', 'name', 'year', 'category'),
+        ((i, f'Произведение {i}', rnd.randint(1950, 2020),
+          rnd.randint(1, 10)) for i in range(1, titles + 1))
+    )
+    write_csv(
+        os.path.join(csv_dir, 'genre_title.csv'),
+        ('id', 'title_id', 'genre_id'),
+        ((i, i, rnd.randint(1, 30)) for i in range(1, titles + 1))
+    )
+    write_csv(
+        os.path.join(csv_dir, 'review.csv'),
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        ((i, i % titles + 1, 'Текст отзыва ' * 5,
+          i // titles % users + 1, rnd.randint(1, 10), pub_date)
+         for i in range(reviews))
+    )
+    write_csv(
+        os.path.join(csv_dir, 'comments.csv'),
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        ((i, rnd.randint(0, reviews - 1), 'Текст комментария',
+          rnd.randint(1, users), pub_date) for i in range(1, comments + 1))
+    )
+
+
+def measure(engine, chunksize, bulk):
+    """Выполняется в дочернем процессе."""
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    from django.core.management import call_command
+
+    started = time.perf_counter()
+    django.setup()
+    if engine == 'import pandas':
+        import pandas  # noqa: F401
+    else:
+        import core.management.commands.import_csv  # noqa: F401
+    result = {
+        'startup_s': time.perf_counter() - started,
+        'startup_rss_mb': max_rss_mb(),
+    }
+    if engine != 'import pandas':
+        call_command('migrate', verbosity=0)
+        started = time.perf_counter()
+        call_command(
+            'import_csv', engine=engine, chunksize=chunksize, bulk=bulk
+        )
+        result['load_s'] = time.perf_counter() - started
+    result['peak_rss_mb'] = max_rss_mb()
+    print(json.dumps(result))
+
+
+def run(engine, csv_dir, chunksize, bulk):
+    with tempfile.TemporaryDirectory() as db_dir:
+        env = dict(
+            os.environ,
+            DB_NAME=os.path.join(db_dir, 'db.sqlite3'),
+            CSV_DIR=csv_dir,
+        )
+        command = [sys.executable, __file__, '--child', engine]
+        if chunksize:
+            command += ['--chunksize', str(chunksize)]
+        if bulk:
+            command.append('--bulk')
+        output = subprocess.run(
+            command, env=env, check=True, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, universal_newlines=True
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=50000)
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument('--chunksize', type=int, default=None)
+    parser.add_argument('--bulk', action='store_true')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--child')
+    args = parser.parse_args()
+    if args.child:
+        measure(args.child, args.chunksize, args.bulk)
+        return
+    with tempfile.TemporaryDirectory() as csv_dir:
+        generate(
+            csv_dir, args.titles, args.users, args.reviews, args.comments,
+            args.seed
+        )
+        print(f'{"замер":<14}{"запуск, с":>12}{"RSS запуска":>14}'
+              f'{"загрузка, с":>14}{"пиковый RSS":>14}')
+        for engine in ('import pandas', 'csv', 'pandas'):
+            result = run(engine, csv_dir, args.chunksize, args.bulk)
+            load = result.get('load_s')
+            print(
+                f'{engine:<14}{result["startup_s"]:>12.3f}'
+                f'{result["startup_rss_mb"]:>12.1f}МБ'
+                f'{"" if load is None else f"{load:.2f}":>14}'
+                f'{result["peak_rss_mb"]:>12.1f}МБ'
+            )
+
+
+if __name__ == '__main__':
+    main()
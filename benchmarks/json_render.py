@@ -0,0 +1,111 @@
+"""Время вывода страниц API в JSON: JSONRenderer DRF против
+FastJSONRenderer (orjson) для произведений, отзывов и комментариев.
+
+Данные сериализуются один раз из временной базы SQLite, замеряется
+только рендеринг. Запуск из корня репозитория:
+
+    python benchmarks/json_render.py --page-size 100 --repeat 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT, 'api_yamdb')
+
+
+def setup(db_dir):
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ['DB_NAME'] = os.path.join(db_dir, 'db.sqlite3')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+
+    django.setup()
+
+
+def create_pages(size):
+    """Сериализованные страницы произведений, отзывов и комментариев."""
+    from django.core.management import call_command
+    from django.db.models.signals import post_save
+    from api.serializers import (CommentSerializer, ReadOnlyTitleSerializer,
+                                 ReviewSerializer)
+    from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                                Title)
+    from reviews.signals import update_title_rating
+    from users.models import User
+
+    call_command('migrate', verbosity=0)
+    post_save.disconnect(update_title_rating, sender=Review)
+    category = Category.objects.create(name='Фильмы', slug='films')
+    genres = Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(3)
+    )
+    titles = Title.objects.bulk_create(
+        Title(name=f'Произведение «{i}»', year=2000, category=category,
+              description='Описание произведения ' * 5, rating=7)
+        for i in range(size)
+    )
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre=genre)
+        for title in titles for genre in genres
+    )
+    users = User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(size)
+    )
+    title = Title.objects.first()
+    Review.objects.bulk_create(
+        Review(title=title, author=user, text='Текст отзыва ' * 20, score=7)
+        for user in users
+    )
+    review = Review.objects.first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=user, text='Текст комментария ' * 10)
+        for user in users
+    )
+    return {
+        'titles': ReadOnlyTitleSerializer(
+            Title.objects.all()[:size], many=True
+        ).data,
+        'reviews': ReviewSerializer(
+            Review.objects.all()[:size], many=True
+        ).data,
+        'comments': CommentSerializer(
+            Comment.objects.all()[:size], many=True
+        ).data,
+    }
+
+
+def measure(renderer, data, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        renderer.render({'count': len(data), 'results': data})
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as db_dir:
+        setup(db_dir)
+        from rest_framework.renderers import JSONRenderer
+        from core.renderers import FastJSONRenderer, orjson
+
+        if orjson is None:
+            sys.exit('Для сравнения установите пакет orjson')
+        pages = create_pages(args.page_size)
+        print(f'{"страница":<12}{"JSONRenderer, мс":>18}'
+              f'{"orjson, мс":>12}{"ускорение":>12}')
+        for name, data in pages.items():
+            standard = measure(JSONRenderer(), data, args.repeat)
+            fast = measure(FastJSONRenderer(), data, args.repeat)
+            print(f'{name:<12}{standard * 1000:>18.3f}'
+                  f'{fast * 1000:>12.3f}{standard / fast:>11.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Накладные расходы на запрос к API с обычными настройками
+(api_yamdb.settings) и с настройками для боевого запуска
+(api_yamdb.settings_production).
+
+Запросы выполняются через обработчик Django в отдельном процессе
+для каждого профиля, на временной базе SQLite с небольшим набором
+данных. Запуск из корня репозитория:
+
+    python benchmarks/request_overhead.py --requests 2000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT, 'api_yamdb')
+
+PROFILES = ('api_yamdb.settings', 'api_yamdb.settings_production')
+
+URLS = ('/api/v1/categories/', '/api/v1/titles/')
+
+
+def measure(requests):
+    """Выполняется в дочернем процессе."""
+    sys.path.insert(0, PROJECT_DIR)
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    from django.test import Client
+    from reviews.models import Category, Genre, Title
+
+    call_command('migrate', verbosity=0)
+    category = Category.objects.create(name='Фильмы', slug='films')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    for number in range(5):
+        title = Title.objects.create(
+            name=f'Произведение {number}', year=2000, category=category
+        )
+        title.genre.add(genre)
+    client = Client(HTTP_ACCEPT='application/json')
+    result = {}
+    for url in URLS:
+        for _ in range(requests // 10):
+            client.get(url)
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(url)
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, response.status_code
+        result[url] = elapsed / requests
+    print(json.dumps(result))
+
+
+def run(profile, requests):
+    with tempfile.TemporaryDirectory() as db_dir:
+        env = dict(
+            os.environ,
+            DB_NAME=os.path.join(db_dir, 'db.sqlite3'),
+            DJANGO_SETTINGS_MODULE=profile,
+            SECRET_KEY='benchmark-secret-key',
+            ALLOWED_HOSTS='testserver',
+        )
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', '--requests',
+             str(requests)],
+            env=env, check=True, stdout=subprocess.PIPE,
+            universal_newlines=True
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--child', action='store_true')
+    args = parser.parse_args()
+    if args.child:
+        measure(args.requests)
+        return
+    results = {profile: run(profile, args.requests) for profile in PROFILES}
+    print(f'{"адрес":<24}' + ''.join(f'{p:>34}' for p in PROFILES))
+    for url in URLS:
+        print(f'{url:<24}' + ''.join(
+            f'{results[profile][url] * 1e6:>31.0f}мкс' for profile in PROFILES
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""Пропускная способность API при одновременном чтении и записи
+в SQLite: настройки Django по умолчанию против постоянных соединений
+и PRAGMA из settings.SQLITE_PRAGMAS (WAL, busy_timeout).
+
+Читатели запрашивают список произведений, писатели добавляют
+комментарии. Каждый клиент работает в отдельном процессе через
+обработчик запросов Django, поэтому учитываются и открытие соединений,
+и сигналы начала и конца запроса. Запуск из корня репозитория:
+
+    python benchmarks/sqlite_concurrency.py --readers 4 --writers 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT, 'api_yamdb')
+
+MODES = {
+    'default': {'pragmas': {}, 'conn_max_age': 0},
+    'tuned': {'pragmas': None, 'conn_max_age': 60},
+}
+
+
+def setup(mode):
+    """Выполняется в дочернем процессе до первого обращения к БД."""
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    os.environ['DB_CONN_MAX_AGE'] = str(MODES[mode]['conn_max_age'])
+    import django
+    from django.conf import settings
+
+    django.setup()
+    if MODES[mode]['pragmas'] is not None:
+        settings.SQLITE_PRAGMAS = MODES[mode]['pragmas']
+
+
+def prepare(mode, titles, users):
+    setup(mode)
+    from django.core.management import call_command
+    from reviews.models import Category, Review, Title
+    from users.models import User
+
+    call_command('migrate', verbosity=0)
+    category = Category.objects.create(name='Фильмы', slug='films')
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=2000, category=category)
+        for i in range(titles)
+    )
+    User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(users)
+    )
+    author = User.objects.first()
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text='Отзыв', score=5)
+        for title in Title.objects.all()
+    )
+
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def client(mode, role, number, duration):
+    """Выполняется в дочернем процессе: запросы в течение duration с."""
+    setup(mode)
+    from django.db.utils import OperationalError
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from reviews.models import Review
+    from users.models import User
+
+    http = Client()
+    if role == 'writer':
+        user = User.objects.order_by('pk')[number]
+        token = RefreshToken.for_user(user).access_token
+        http.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        reviews = list(Review.objects.values_list('pk', 'title_id'))
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    position = number
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if role == 'writer':
+                review_id, title_id = reviews[position % len(reviews)]
+                response = http.post(
+                    f'/api/v1/titles/{title_id}/reviews/{review_id}'
+                    '/comments/',
+                    {'text': 'Комментарий'}
+                )
+            else:
+                response = http.get(
+                    f'/api/v1/titles/?page={position % 20 + 1}'
+                )
+            ok = response.status_code < 400
+        except OperationalError:
+            ok = False
+        position += 1
+        if ok:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    print(json.dumps({'latencies': latencies, 'errors': errors}))
+
+
+def run(mode, args):
+    roles = ['reader'] * args.readers + ['writer'] * args.writers
+    with tempfile.TemporaryDirectory() as db_dir:
+        env = dict(os.environ, DB_NAME=os.path.join(db_dir, 'db.sqlite3'))
+        subprocess.run(
+            [sys.executable, __file__, '--child', 'prepare', '--mode', mode,
+             '--titles', str(args.titles), '--users', str(len(roles))],
+            env=env, check=True
+        )
+        processes = [
+            subprocess.Popen(
+                [sys.executable, __file__, '--child', role, '--mode', mode,
+                 '--number', str(number), '--duration', str(args.duration)],
+                env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                universal_newlines=True
+            )
+            for number, role in enumerate(roles)
+        ]
+        results = {'reader': [], 'writer': []}
+        errors = {'reader': 0, 'writer': 0}
+        for role, process in zip(roles, processes):
+            output = process.communicate()[0]
+            result = json.loads(output.strip().splitlines()[-1])
+            results[role].extend(result['latencies'])
+            errors[role] += result['errors']
+    return results, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--titles', type=int, default=100)
+    parser.add_argument('--child')
+    parser.add_argument('--mode', choices=MODES, default='tuned')
+    parser.add_argument('--number', type=int, default=0)
+    parser.add_argument('--users', type=int, default=4)
+    args = parser.parse_args()
+    if args.child == 'prepare':
+        prepare(args.mode, args.titles, args.users)
+        return
+    if args.child:
+        client(args.mode, args.child, args.number, args.duration)
+        return
+    print(f'{"режим":<10}{"клиенты":<10}{"запросов/с":>12}'
+          f'{"p50, мс":>10}{"p95, мс":>10}{"ошибки":>10}')
+    for mode in MODES:
+        results, errors = run(mode, args)
+        for role in ('reader', 'writer'):
+            latencies = results[role]
+            print(
+                f'{mode:<10}{role:<10}'
+                f'{len(latencies) / args.duration:>12.1f}'
+                f'{percentile(latencies, 0.5) * 1000:>10.1f}'
+                f'{percentile(latencies, 0.95) * 1000:>10.1f}'
+                f'{errors[role]:>10}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
 import os
 import sys
 
+import pytest
+
 from django.utils.version import get_version
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -34,3 +36,25 @@ assert get_version() < '3.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Очистка базы между тестами не вызывает сигналов моделей,
+    # поэтому кеш ответов API сбрасывается явно.
+    from django.core.cache import cache
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def query_inspection(settings):
+    # Запросы одной формы, повторенные в пределах запроса к API,
+    # и превышение QUERY_BUDGETS проваливают тест.
+    from core import querylog
+    settings.QUERY_INSPECTION = dict(
+        settings.QUERY_INSPECTION, ENABLED=True, RECORD=True
+    )
+    querylog.violations.clear()
+    yield
+    if querylog.violations:
+        pytest.fail('\n'.join(querylog.violations), pytrace=False)
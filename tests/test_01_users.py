@@ -571,3 +571,75 @@ class Test01UserAPI:
             'Проверьте, что при PATCH запросе `/api/v1/users/me/`, '
             'пользователь с ролью user не может сменить себе роль'
         )
+
+
+class Test01UserUniqueness:
+
+    @staticmethod
+    def uniqueness_queries(queries):
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+            and '"users_user"."username" =' in query['sql']
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('url, client_name', [
+        ('/api/v1/auth/signup/', 'client'),
+        ('/api/v1/users/', 'admin_client'),
+    ])
+    def test_01_unique_check_one_query(self, request, url, client_name):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        client = request.getfixturevalue(client_name)
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data=data)
+        assert response.status_code in (200, 201)
+        assert len(self.uniqueness_queries(context.captured_queries)) == 1, (
+            f'Проверьте, что при POST запросе `{url}` уникальность username '
+            'и email проверяется одним запросом к БД'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_me_unique_check_one_query(self, user_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.patch(
+                '/api/v1/users/me/', data={'username': 'renamed'}
+            )
+        assert response.status_code == 200
+        assert len(self.uniqueness_queries(context.captured_queries)) == 1, (
+            'Проверьте, что при PATCH запросе `/api/v1/users/me/` '
+            'уникальность проверяется одним запросом к БД'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_case_variant_email(self, client, admin_client, user_client,
+                                   admin):
+        variant = admin.email.upper()
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'variant', 'email': variant
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что при регистрации email, отличающийся только '
+            'регистром, считается занятым'
+        )
+        response = admin_client.post('/api/v1/users/', data={
+            'username': 'variant', 'email': variant
+        })
+        assert response.status_code == 400
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'email': variant}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что при PATCH запросе `/api/v1/users/me/` email, '
+            'отличающийся только регистром, считается занятым'
+        )
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'email': 'New.Mail@yamdb.fake'}
+        )
+        assert response.json()['email'] == 'new.mail@yamdb.fake'
@@ -0,0 +1,465 @@
+import importlib
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class Test08PurgeUnconfirmed:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_purge_stale_signups(self, admin):
+        old = timezone.now() - timedelta(days=30)
+        for number in range(5):
+            User.objects.create(
+                username=f'stale_{number}', email=f'stale_{number}@yamdb.fake',
+                confirmation_code='code'
+            )
+        User.objects.filter(username__startswith='stale_').update(
+            date_joined=old
+        )
+        User.objects.create(
+            username='fresh', email='fresh@yamdb.fake',
+            confirmation_code='code'
+        )
+        User.objects.create(
+            username='confirmed', email='confirmed@yamdb.fake',
+            confirmation_code='code', last_login=old, date_joined=old
+        )
+
+        call_command('purge_unconfirmed', days=7, batch_size=2, pause=0)
+
+        assert not User.objects.filter(
+            username__startswith='stale_'
+        ).exists(), (
+            'Проверьте, что команда `purge_unconfirmed` удаляет '
+            'неподтвержденные регистрации старше заданного возраста'
+        )
+        assert set(User.objects.values_list('username', flat=True)) == {
+            admin.username, 'fresh', 'confirmed'
+        }, (
+            'Проверьте, что команда `purge_unconfirmed` не удаляет свежие '
+            'и подтвержденные учетные записи'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_purge_keeps_users_confirmed_before_deploy(self, admin):
+        from django.apps import apps
+
+        migration = importlib.import_module(
+            'users.migrations.0004_mark_existing_users_confirmed'
+        )
+        old = timezone.now() - timedelta(days=30)
+        User.objects.create(
+            username='existing', email='existing@yamdb.fake',
+            confirmation_code='code'
+        )
+        User.objects.filter(username='existing').update(date_joined=old)
+
+        migration.mark_confirmed(apps, None)
+        call_command('purge_unconfirmed', days=7, pause=0)
+
+        assert User.objects.filter(username='existing').exists(), (
+            'Проверьте, что миграция помечает существующих пользователей '
+            'с кодом подтверждения как подтвержденных и команда '
+            '`purge_unconfirmed` их не удаляет'
+        )
+
+
+CSV_FILES = {
+    'genre.csv': (
+        'id,name,slug\n'
+        '1,Драма,drama\n'
+        '2,Комедия,comedy\n'
+    ),
+    'category.csv': (
+        'id,name,slug\n'
+        '1,Фильм,movie\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,Согласен,101,2019-09-24T21:08:21.567Z\n'
+    ),
+    'genre_title.csv': (
+        'id,title_id,genre_id\n'
+        '1,1,1\n'
+        '2,1,2\n'
+    ),
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,Отличный фильм,100,10,2019-09-24T21:08:21.567Z\n'
+        '2,1,Так себе,101,4,2019-09-24T21:08:21.567Z\n'
+    ),
+    'titles.csv': (
+        'id,name,year,category\n'
+        '1,Побег из Шоушенка,1994,1\n'
+    ),
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,bingobongo,bingobongo@yamdb.fake,user,,,\n'
+        '101,capt_obvious,capt_obvious@yamdb.fake,admin,,,\n'
+    ),
+}
+
+
+@pytest.fixture
+def csv_dir(tmp_path, settings):
+    for file_csv, content in CSV_FILES.items():
+        (tmp_path / file_csv).write_text(content, encoding='utf-8')
+    settings.CSV_DIR = str(tmp_path)
+    return tmp_path
+
+
+class Test08ImportCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('chunksize', [None, 1])
+    @pytest.mark.parametrize('engine', ['csv', 'pandas'])
+    def test_01_import_csv(self, csv_dir, chunksize, engine):
+        from reviews.models import Comment, Review, Title
+
+        call_command('import_csv', chunksize=chunksize, engine=engine)
+
+        title = Title.objects.get(pk=1)
+        assert title.category.slug == 'movie', (
+            'Проверьте, что команда `import_csv` загружает произведения '
+            'вместе с категорией'
+        )
+        assert set(title.genre.values_list('slug', flat=True)) == {
+            'drama', 'comedy'
+        }, (
+            'Проверьте, что команда `import_csv` загружает связи '
+            'произведений и жанров'
+        )
+        assert Review.objects.filter(title=title).count() == 2
+        assert Review.objects.get(pk=1).pub_date.year == 2019
+        assert title.rating == 7, (
+            'Проверьте, что после `import_csv` рейтинг произведений '
+            'пересчитан по загруженным отзывам'
+        )
+        assert Comment.objects.get(pk=1).author.username == 'capt_obvious'
+        assert User.objects.get(pk=101).is_admin
+
+    def test_02_import_csv_dependency_order(self, settings):
+        from core.management.commands.import_csv import (
+            get_table_models, sort_by_dependencies
+        )
+
+        order = [
+            file_csv for file_csv, _ in sort_by_dependencies(
+                settings.DICT_TABLE, get_table_models()
+            )
+        ]
+        for file_csv, dependencies in (
+            ('titles.csv', ('category.csv',)),
+            ('genre_title.csv', ('titles.csv', 'genre.csv')),
+            ('review.csv', ('titles.csv', 'users.csv')),
+            ('comments.csv', ('review.csv', 'users.csv')),
+        ):
+            for dependency in dependencies:
+                assert order.index(dependency) < order.index(file_csv), (
+                    f'Проверьте, что `import_csv` загружает {dependency} '
+                    f'раньше, чем {file_csv}'
+                )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_import_csv_repeat(self, csv_dir):
+        from reviews.models import Review
+
+        call_command('import_csv')
+        with pytest.raises(CommandError):
+            call_command('import_csv')
+        call_command('import_csv', validate=False)
+
+        assert Review.objects.count() == 2, (
+            'Проверьте, что повторный запуск `import_csv` не дублирует данные'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_import_csv_upsert(self, csv_dir):
+        from reviews.models import Review
+
+        call_command('import_csv')
+        (csv_dir / 'review.csv').write_text(
+            'id,title_id,text,author,score,pub_date\n'
+            '1,1,Отличный фильм,100,10,2019-09-24T21:08:21.567Z\n'
+            '2,1,Пересмотрел - хорошо,101,8,2019-09-24T21:08:21.567Z\n'
+            '3,1,Новый отзыв,102,6,2019-09-25T21:08:21.567Z\n',
+            encoding='utf-8'
+        )
+        with open(csv_dir / 'users.csv', 'a', encoding='utf-8') as file:
+            file.write('102,newbie,newbie@yamdb.fake,user,,,\n')
+
+        call_command('import_csv', upsert=True)
+
+        assert Review.objects.count() == 3, (
+            'Проверьте, что `import_csv --upsert` добавляет новые строки'
+        )
+        review = Review.objects.get(pk=2)
+        assert (review.text, review.score) == ('Пересмотрел - хорошо', 8), (
+            'Проверьте, что `import_csv --upsert` обновляет измененные строки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_import_csv_incremental(self, csv_dir):
+        from core.models import ImportManifest
+        from reviews.models import Comment
+
+        call_command('import_csv', incremental=True)
+        with open(csv_dir / 'comments.csv', 'a', encoding='utf-8') as file:
+            file.write('2,2,Не согласен,100,2019-09-26T21:08:21Z\n')
+        (csv_dir / 'genre.csv').write_text(
+            (csv_dir / 'genre.csv').read_text(encoding='utf-8'),
+            encoding='utf-8'
+        )
+
+        call_command('import_csv', incremental=True)
+
+        assert Comment.objects.count() == 2, (
+            'Проверьте, что `import_csv --incremental` загружает строки, '
+            'дописанные в конец файла'
+        )
+        manifest = ImportManifest.objects.get(file_name='comments.csv')
+        assert manifest.rows == 2
+        assert manifest.size == (csv_dir / 'comments.csv').stat().st_size
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_import_csv_bulk(self, csv_dir):
+        from django.db import connection
+
+        from reviews.models import Review
+
+        def review_indexes():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' "
+                    "AND tbl_name = 'reviews_review'"
+                )
+                return {row[0] for row in cursor.fetchall()}
+
+        indexes = review_indexes()
+
+        call_command('import_csv', bulk=True)
+
+        assert Review.objects.count() == 2, (
+            'Проверьте, что `import_csv --bulk` загружает данные'
+        )
+        assert review_indexes() == indexes, (
+            'Проверьте, что `import_csv --bulk` восстанавливает индексы '
+            'после загрузки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_import_csv_validation(self, csv_dir):
+        from reviews.models import Genre, Review
+
+        (csv_dir / 'titles.csv').write_text(
+            'id,name,year,category\n'
+            '1,Побег из Шоушенка,1994,1\n'
+            '2,Из будущего,3000,1\n',
+            encoding='utf-8'
+        )
+        (csv_dir / 'review.csv').write_text(
+            'id,title_id,text,author,score,pub_date\n'
+            '1,1,Отличный фильм,100,11,2019-09-24T21:08:21.567Z\n'
+            '1,5,Нет такого произведения,101,4,2019-09-24T21:08:21.567Z\n',
+            encoding='utf-8'
+        )
+
+        with pytest.raises(CommandError) as error:
+            call_command('import_csv')
+
+        assert 'titles.csv' in str(error.value)
+        assert 'review.csv' in str(error.value)
+        assert not Genre.objects.exists() and not Review.objects.exists(), (
+            'Проверьте, что `import_csv` не записывает данные, '
+            'если файлы не прошли проверку'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_import_csv_validation_incremental(self, csv_dir, caplog):
+        from core.validation import KnownKeys
+        from reviews.models import Comment, Review
+
+        call_command('import_csv', incremental=True)
+        with open(csv_dir / 'comments.csv', 'a', encoding='utf-8') as file:
+            file.write('2,2,Не согласен,999,2019-09-26T21:08:21Z\n')
+
+        with pytest.raises(CommandError):
+            call_command('import_csv', incremental=True)
+
+        assert "строка 2 (author=999)" in caplog.text, (
+            'Проверьте, что при дозагрузке номера строк в ошибках '
+            'считаются от начала файла'
+        )
+        known_keys = KnownKeys([Review])
+        known_keys.add(Comment, {1, 2})
+        known_keys.add(Review, {1, 2})
+        assert list(known_keys.keys) == [Review], (
+            'Проверьте, что при проверке хранятся только ключи моделей, '
+            'на которые ссылаются файлы загрузки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('suffix', ['.csv.gz', '.jsonl', '.parquet'])
+    def test_08_import_formats(self, csv_dir, suffix):
+        import csv
+        import gzip
+        import json
+
+        from reviews.models import Review
+
+        source = csv_dir / 'review.csv'
+        with open(source, encoding='utf-8', newline='') as file:
+            records = list(csv.DictReader(file))
+        source.unlink()
+        target = csv_dir / f'review{suffix}'
+        if suffix == '.csv.gz':
+            with gzip.open(target, 'wt', encoding='utf-8') as file:
+                file.write(CSV_FILES['review.csv'])
+        elif suffix == '.jsonl':
+            for record in records:
+                record['score'] = int(record['score'])
+            target.write_text(
+                '\n'.join(json.dumps(record) for record in records),
+                encoding='utf-8'
+            )
+        else:
+            pq = pytest.importorskip('pyarrow.parquet')
+            import pyarrow
+
+            pq.write_table(pyarrow.Table.from_pylist(records), str(target))
+
+        call_command('import_csv')
+
+        assert sorted(Review.objects.values_list('score', flat=True)) == [
+            4, 10
+        ], (
+            f'Проверьте, что `import_csv` загружает файлы {suffix}'
+        )
+
+
+class Test08ExportCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('compress', [False, True])
+    def test_01_export_csv(self, csv_dir, tmp_path_factory, compress):
+        import csv
+        import gzip
+
+        call_command('import_csv')
+        output = tmp_path_factory.mktemp('export')
+
+        call_command('export_csv', output=str(output), gzip=compress)
+
+        for file_csv, content in CSV_FILES.items():
+            path = output / file_csv
+            if compress:
+                path = output / f'{file_csv}.gz'
+                file = gzip.open(path, 'rt', encoding='utf-8', newline='')
+            else:
+                file = open(path, encoding='utf-8', newline='')
+            with file:
+                exported = list(csv.reader(file))
+            expected = list(csv.reader(content.splitlines()))
+            assert exported[0] == expected[0], (
+                'Проверьте, что `export_csv` сохраняет колонки в том же '
+                f'порядке, что и в файле {file_csv}'
+            )
+            assert len(exported) == len(expected), (
+                f'Проверьте, что `export_csv` выгружает все строки {file_csv}'
+            )
+
+
+class Test08SeedData:
+    SIZES = {
+        'titles': 30, 'users': 40, 'reviews': 300, 'comments': 500,
+        'genres': 5, 'categories': 3,
+    }
+
+    def snapshot(self):
+        from reviews.models import Comment, GenreTitle, Review, Title
+
+        return (
+            list(Title.objects.order_by('pk').values_list()),
+            list(GenreTitle.objects.order_by('pk').values_list()),
+            list(Review.objects.order_by('pk').values_list()),
+            list(Comment.objects.order_by('pk').values_list()),
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('bulk', [False, True])
+    def test_01_seed_data(self, bulk):
+        from django.db.models import Count
+        from reviews.models import Comment, Review, Title
+
+        call_command('seed_data', seed=7, bulk=bulk, **self.SIZES)
+
+        assert User.objects.count() == self.SIZES['users']
+        assert Title.objects.count() == self.SIZES['titles']
+        assert Review.objects.count() == self.SIZES['reviews'], (
+            'Проверьте, что `seed_data` создает заданное число отзывов, '
+            'даже если популярным произведениям не хватает авторов'
+        )
+        assert Comment.objects.count() == self.SIZES['comments'], (
+            'Проверьте, что `seed_data` создает заданное число комментариев'
+        )
+        per_title = list(
+            Review.objects.values('title').annotate(
+                reviews=Count('pk')
+            ).order_by('title').values_list('reviews', flat=True)
+        )
+        assert per_title[0] == max(per_title) > per_title[-1], (
+            'Проверьте, что популярность произведений в `seed_data` '
+            'распределена неравномерно'
+        )
+        ratings = list(Title.objects.order_by('pk').values_list(
+            'pk', 'rating'
+        ))
+        Title.objects.update_rating()
+        assert ratings == list(Title.objects.order_by('pk').values_list(
+            'pk', 'rating'
+        )), (
+            'Проверьте, что `seed_data` пересчитывает рейтинг произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_seed_data_deterministic(self):
+        from reviews.models import (Category, Comment, Genre, GenreTitle,
+                                    Review, Title)
+
+        call_command('seed_data', seed=3, **self.SIZES)
+        first = self.snapshot()
+        for model in (Comment, Review, GenreTitle, Title, Genre, Category,
+                      User):
+            model.objects.all().delete()
+
+        call_command('seed_data', seed=3, **self.SIZES)
+
+        assert self.snapshot() == first, (
+            'Проверьте, что `seed_data` с одинаковым --seed создает '
+            'одинаковые данные'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_seed_data_requires_empty_db(self, admin):
+        with pytest.raises(CommandError):
+            call_command('seed_data', **self.SIZES)
+        assert User.objects.count() == 1, (
+            'Проверьте, что `seed_data` не изменяет непустую БД'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_seed_data_too_many_reviews(self):
+        sizes = dict(self.SIZES, reviews=self.SIZES['titles'] * 40 + 1)
+        with pytest.raises(CommandError):
+            call_command('seed_data', **sizes)
+        assert not User.objects.exists(), (
+            'Проверьте, что `seed_data` отказывается создавать больше '
+            'отзывов, чем пар автор - произведение'
+        )
@@ -0,0 +1,266 @@
+import threading
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import OperationalError, connection
+
+from .common import create_titles
+
+
+class Test09Connection:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_sqlite_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+        assert busy_timeout == settings.SQLITE_PRAGMAS['busy_timeout'], (
+            'Проверьте, что новому соединению с SQLite выставляется '
+            '`busy_timeout` из `SQLITE_PRAGMAS`'
+        )
+        assert synchronous == 1, (
+            'Проверьте, что новому соединению с SQLite выставляется '
+            '`synchronous = NORMAL`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_health_check(self):
+        connection.ensure_connection()
+        with mock.patch.dict(connection.settings_dict, CONN_HEALTH_CHECKS=True):
+            request_started.send(sender=None)
+            assert connection.connection is not None, (
+                'Проверьте, что рабочее постоянное соединение '
+                'не закрывается в начале запроса'
+            )
+            with mock.patch.object(
+                connection, 'is_usable', return_value=False
+            ), mock.patch.object(connection, 'close') as close:
+                request_started.send(sender=None)
+        assert close.called, (
+            'Проверьте, что неработающее постоянное соединение закрывается '
+            'в начале запроса при `CONN_HEALTH_CHECKS`'
+        )
+
+
+class Test09Migrations:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_duplicate_emails_block_constraint(self):
+        from django.db import IntegrityError
+        from django.db.migrations.executor import MigrationExecutor
+
+        before = [('users', '0002_alter_user_first_name')]
+        after = [('users', '0003_user_normalized_email')]
+        executor = MigrationExecutor(connection)
+        leaf = executor.loader.graph.leaf_nodes('users')
+        executor.migrate(before)
+        try:
+            executor.loader.build_graph()
+            User = executor.loader.project_state(before).apps.get_model(
+                'users', 'User'
+            )
+            User.objects.create(username='first', email='Dup@yamdb.fake')
+            User.objects.create(username='second', email='dup@yamdb.fake')
+            User.objects.create(username='other', email='Other@yamdb.fake')
+            with pytest.raises(IntegrityError) as error:
+                executor.migrate(after)
+            assert 'first <Dup@yamdb.fake>' in str(error.value), (
+                'Проверьте, что миграция `0003_user_normalized_email` '
+                'сообщает, какие учетные записи нарушают уникальность email'
+            )
+            assert 'other' not in str(error.value)
+            User.objects.filter(username='second').update(
+                email='second@yamdb.fake'
+            )
+            executor.loader.build_graph()
+            executor.migrate(after)
+            assert set(User.objects.values_list('email', flat=True)) == {
+                'dup@yamdb.fake', 'second@yamdb.fake', 'other@yamdb.fake'
+            }, (
+                'Проверьте, что после исправления дубликатов миграция '
+                'приводит email к нижнему регистру'
+            )
+        finally:
+            executor.loader.build_graph()
+            executor.migrate(leaf)
+
+
+@pytest.fixture
+def write_queue_enabled(settings):
+    settings.WRITE_QUEUE = dict(
+        settings.WRITE_QUEUE, ENABLED=True, WINDOW=0.2, BACKOFF=0.001
+    )
+    from core.writer import write_queue
+    return write_queue
+
+
+class Test09WriteQueue:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_group_commit(self, write_queue_enabled):
+        from core import writer
+        from reviews.models import Genre
+
+        batches = write_queue_enabled.batches
+        threads = [
+            threading.Thread(target=writer.run, args=(
+                Genre.objects.create,
+            ), kwargs={'name': f'Жанр {number}', 'slug': f'genre-{number}'})
+            for number in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert Genre.objects.count() == 5, (
+            'Проверьте, что очередь записи выполняет все задания'
+        )
+        assert write_queue_enabled.batches - batches < 5, (
+            'Проверьте, что очередь записи объединяет одновременные '
+            'задания в одну транзакцию'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_retry_and_errors(self, write_queue_enabled):
+        from core import writer
+        from reviews.models import Genre
+
+        attempts = []
+
+        def create_genre():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OperationalError('database is locked')
+            return Genre.objects.create(name='Жанр', slug='genre')
+
+        retries = write_queue_enabled.retries
+        genre = writer.run(create_genre)
+        assert genre.pk and len(attempts) == 2, (
+            'Проверьте, что при блокировке БД очередь записи повторяет '
+            'задание и возвращает его результат'
+        )
+        assert write_queue_enabled.retries == retries + 1
+
+        def fail():
+            raise ValueError('ошибка задания')
+
+        with pytest.raises(ValueError):
+            writer.run(fail)
+        assert Genre.objects.filter(slug='genre').exists(), (
+            'Проверьте, что ошибка задания не откатывает другие записи'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_api_writes(self, write_queue_enabled, admin_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = admin_client.post(url, data={'text': 'Текст', 'score': 8})
+        assert response.status_code == 201, (
+            'Проверьте, что при включенной очереди записи отзыв создается'
+        )
+        assert Title.objects.get(pk=titles[0]['id']).rating == 8
+        response = admin_client.post(url, data={'text': 'Текст', 'score': 8})
+        assert response.status_code == 400, (
+            'Проверьте, что при включенной очереди записи проверка '
+            'данных отзыва выполняется как обычно'
+        )
+        review_id = Title.objects.get(pk=titles[0]['id']).reviews.get().pk
+        response = admin_client.delete(f'{url}{review_id}/')
+        assert response.status_code == 204, (
+            'Проверьте, что при включенной очереди записи отзыв удаляется'
+        )
+
+
+class Test09ReadReplicas:
+
+    def route(self, rf, method, path, view, authorization=''):
+        from core.middleware import ReplicaMiddleware
+        from core.routers import ReadReplicaRouter
+        from reviews.models import Title
+
+        databases = []
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            databases.append(ReadReplicaRouter().db_for_read(Title))
+            return mock.Mock(status_code=201 if method == 'post' else 200)
+        middleware = ReplicaMiddleware(get_response)
+        request = getattr(rf, method)(
+            path, HTTP_AUTHORIZATION=authorization
+        )
+        middleware(request)
+        return databases[0]
+
+    def test_01_routing(self, rf, settings):
+        from api.views import TitleViewSet
+        from users.views import UsersViewSet
+
+        settings.READ_REPLICAS = ['replica_1']
+        titles = TitleViewSet.as_view({'get': 'list', 'post': 'create'})
+        users = UsersViewSet.as_view({'get': 'list'})
+        assert self.route(
+            rf, 'get', '/api/v1/titles/', titles, 'Bearer first'
+        ) == 'replica_1', (
+            'Проверьте, что GET запрос к `TitleViewSet` читает с реплики'
+        )
+        assert self.route(rf, 'get', '/api/v1/users/', users) is None, (
+            'Проверьте, что представления не из `READ_REPLICA_VIEWS` '
+            'читают из основной базы'
+        )
+        self.route(rf, 'post', '/api/v1/titles/', titles, 'Bearer first')
+        assert self.route(
+            rf, 'get', '/api/v1/titles/', titles, 'Bearer first'
+        ) is None, (
+            'Проверьте, что после записи клиент читает из основной базы '
+            'в течение `READ_YOUR_WRITES_WINDOW`'
+        )
+        assert self.route(
+            rf, 'get', '/api/v1/titles/', titles, 'Bearer second'
+        ) == 'replica_1', (
+            'Проверьте, что запись одного клиента не отключает реплики '
+            'для других клиентов'
+        )
+
+    def test_02_users_read_from_primary(self):
+        from django.contrib.auth import get_user_model
+
+        from core.routers import ReadReplicaRouter, set_read_database
+        from reviews.models import Title
+
+        router = ReadReplicaRouter()
+        set_read_database('replica_1')
+        try:
+            assert router.db_for_read(Title) == 'replica_1'
+            database = router.db_for_read(get_user_model())
+        finally:
+            set_read_database(None)
+        assert database is None, (
+            'Проверьте, что пользователи читаются из основной базы даже '
+            'в запросах, отправленных на реплику: иначе новый '
+            'пользователь получает 401 до синхронизации реплик'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_sync_replicas(self, admin_client, tmp_path):
+        import sqlite3
+
+        from django.core.management import call_command
+
+        create_titles(admin_client)
+        replica = tmp_path / 'replica.sqlite3'
+        call_command('sync_replicas', str(replica))
+        with sqlite3.connect(str(replica)) as copy:
+            count = copy.execute(
+                'SELECT COUNT(*) FROM reviews_title'
+            ).fetchone()[0]
+        assert count == 2, (
+            'Проверьте, что команда `sync_replicas` копирует основную базу '
+            'в файл реплики'
+        )
@@ -0,0 +1,62 @@
+import io
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from .common import create_reviews
+
+
+class Test10FastJSON:
+
+    def test_01_render_matches_drf(self):
+        from core.renderers import FastJSONRenderer
+
+        data = {
+            'pub_date': datetime(
+                2019, 9, 24, 21, 8, 21, 567123, tzinfo=timezone.utc
+            ),
+            'score': Decimal('7.50'),
+            'text': 'Отзыв с переносом',
+            1: None,
+            'genres': [{'name': 'Сказка', 'slug': 'tale'}],
+        }
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(
+            data
+        ), (
+            'Проверьте, что `FastJSONRenderer` выводит даты, Decimal '
+            'и символы \\u2028 так же, как `JSONRenderer`'
+        )
+        assert FastJSONRenderer().render(None) == b''
+        assert b'\n' in FastJSONRenderer().render(
+            data, 'application/json; indent=4'
+        ), 'Проверьте, что `FastJSONRenderer` поддерживает отступы'
+
+    def test_02_parse(self):
+        from rest_framework.exceptions import ParseError
+
+        from core.parsers import FastJSONParser
+
+        data = FastJSONParser().parse(
+            io.BytesIO('{"text": "Отзыв", "score": 5}'.encode())
+        )
+        assert data == {'text': 'Отзыв', 'score': 5}
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"text": '))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_api(self, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        response = admin_client.post(
+            url, data={'text': 'Отзыв', 'score': 5}, format='json'
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что API принимает тело запроса в формате JSON'
+        )
+        response = admin_client.get(url)
+        assert response['Content-Type'] == 'application/json'
+        assert response.json()['results'][0]['pub_date'].endswith('Z'), (
+            'Проверьте, что даты в ответах API выводятся в формате DRF'
+        )
@@ -0,0 +1,92 @@
+import importlib
+
+import pytest
+from rest_framework.test import APIClient
+
+
+def load_production_settings(monkeypatch, **environ):
+    for name in ('SECRET_KEY', 'ALLOWED_HOSTS'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    from api_yamdb import settings_production
+    return importlib.reload(settings_production)
+
+
+@pytest.fixture
+def production_settings(settings, monkeypatch):
+    from rest_framework.settings import api_settings
+    from rest_framework.views import APIView
+
+    settings_production = load_production_settings(
+        monkeypatch, SECRET_KEY='test-secret-key'
+    )
+
+    for name in (
+        'MIDDLEWARE', 'BROWSER_MIDDLEWARE', 'API_PREFIX', 'REST_FRAMEWORK'
+    ):
+        setattr(settings, name, getattr(settings_production, name))
+    # Представления DRF берут классы вывода из настроек при импорте.
+    monkeypatch.setattr(
+        APIView, 'renderer_classes', api_settings.DEFAULT_RENDERER_CLASSES
+    )
+    return settings
+
+
+class Test11ProductionProfile:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_api_skips_browser_middleware(self, production_settings):
+        client = APIClient()
+        response = client.get(
+            '/api/v1/categories/', HTTP_ACCEPT='text/html,*/*;q=0.8'
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что API работает с настройками `settings_production`'
+        )
+        assert response['Content-Type'] == 'application/json', (
+            'Проверьте, что в `settings_production` API отдает только JSON'
+        )
+        assert 'X-Frame-Options' not in response, (
+            'Проверьте, что middleware для браузера не выполняются '
+            'для запросов к API'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_admin_keeps_browser_middleware(self, production_settings):
+        client = APIClient()
+        response = client.get('/admin/login/')
+        assert response.status_code == 200
+        assert response['X-Frame-Options'] == 'DENY' or (
+            response['X-Frame-Options'] == 'SAMEORIGIN'
+        ), 'Проверьте, что админка получает middleware для браузера'
+        assert 'csrftoken' in response.cookies, (
+            'Проверьте, что CSRF-защита админки работает с настройками '
+            '`settings_production`'
+        )
+        response = APIClient(enforce_csrf_checks=True).post('/admin/login/', {
+            'username': 'admin', 'password': 'admin'
+        })
+        assert response.status_code == 403, (
+            'Проверьте, что вход в админку без CSRF-токена отклоняется'
+        )
+
+    def test_03_secrets_from_environment(self, monkeypatch):
+        from django.core.exceptions import ImproperlyConfigured
+
+        with pytest.raises(ImproperlyConfigured):
+            load_production_settings(monkeypatch)
+        settings_production = load_production_settings(
+            monkeypatch, SECRET_KEY='test-secret-key'
+        )
+        assert settings_production.ALLOWED_HOSTS == [], (
+            'Проверьте, что `settings_production` не разрешает любой Host, '
+            'если ALLOWED_HOSTS не задан'
+        )
+        settings_production = load_production_settings(
+            monkeypatch, SECRET_KEY='test-secret-key',
+            ALLOWED_HOSTS='api.yamdb.fake, yamdb.fake'
+        )
+        assert settings_production.ALLOWED_HOSTS == [
+            'api.yamdb.fake', 'yamdb.fake'
+        ]
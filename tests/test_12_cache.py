@@ -0,0 +1,92 @@
+import pytest
+
+from .common import create_reviews, create_titles
+
+
+@pytest.fixture
+def response_cache(settings):
+    settings.API_CACHE_TIMEOUT = 60
+
+
+class Test12ResponseCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_00_disabled_by_default(self, admin_client,
+                                    django_assert_num_queries):
+        from django.conf import settings
+
+        assert not settings.API_CACHE_TIMEOUT, (
+            'Проверьте, что кеш ответов API по умолчанию выключен: '
+            'локальный кеш процесса не сбрасывается в других процессах'
+        )
+        admin_client.get('/api/v1/categories/')
+        with django_assert_num_queries(2):
+            # Пользователь из токена и список категорий.
+            admin_client.get('/api/v1/categories/')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cached_reads(self, admin_client, django_assert_num_queries,
+                            response_cache):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        first = admin_client.get(url)
+        with django_assert_num_queries(1):
+            # Единственный запрос - пользователь из токена.
+            second = admin_client.get(url)
+        assert second.json() == first.json(), (
+            'Проверьте, что повторный запрос произведения отдается из кеша '
+            'с теми же данными'
+        )
+        admin_client.get('/api/v1/titles/')
+        with django_assert_num_queries(1):
+            admin_client.get('/api/v1/titles/')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalidation(self, admin_client, admin, response_cache):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert admin_client.get(url).json()['rating'] == 4
+        reviews_url = f'{url}reviews/'
+        assert admin_client.get(reviews_url).json()['count'] == 3
+        review_id = next(
+            review['id']
+            for review in admin_client.get(reviews_url).json()['results']
+            if review['score'] == 5
+        )
+        admin_client.delete(f'{reviews_url}{review_id}/')
+        assert admin_client.get(reviews_url).json()['count'] == 2, (
+            'Проверьте, что после удаления отзыва список отзывов обновляется'
+        )
+        assert admin_client.get(url).json()['rating'] == 3, (
+            'Проверьте, что после удаления отзыва кешированный рейтинг '
+            'произведения сбрасывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_signals_only_for_cached_models(self, admin):
+        from unittest import mock
+
+        from django.contrib.auth.models import update_last_login
+        from django.contrib.sessions.models import Session
+        from django.db.models.signals import post_delete, post_save
+
+        from core.models import ImportManifest
+        from reviews.models import Title
+
+        for model in (ImportManifest, Session):
+            assert not post_delete.has_listeners(model), (
+                'Проверьте, что сброс кеша подключен только к моделям '
+                'из `cache_models`: иначе Django не может удалять их '
+                'строки одним запросом'
+            )
+        assert post_save.has_listeners(Title)
+        with mock.patch('core.signals.invalidate') as invalidate:
+            update_last_login(None, admin)
+            ImportManifest.objects.create(
+                file_name='genre.csv', size=1, mtime_ns=1, sha256='0',
+                rows=1
+            )
+        assert not invalidate.called, (
+            'Проверьте, что вход пользователя и сохранение манифестов '
+            'загрузки не сбрасывают кеш ответов API'
+        )
@@ -0,0 +1,158 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test13RequestTiming:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_server_timing(self, admin_client):
+        create_titles(admin_client)
+        response = admin_client.get('/api/v1/titles/')
+        assert 'Server-Timing' in response, (
+            'Проверьте, что ответы содержат заголовок `Server-Timing`'
+        )
+        metrics = {
+            part.split(';')[0].strip(): part
+            for part in response['Server-Timing'].split(',')
+        }
+        for name in ('total', 'db', 'serialize', 'render'):
+            assert name in metrics, (
+                f'Проверьте, что `Server-Timing` содержит метрику `{name}`'
+            )
+        assert 'queries' in metrics['db']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_timings_endpoint(self, admin_client, user_client):
+        admin_client.delete('/api/v1/timings/')
+        for _ in range(3):
+            admin_client.get('/api/v1/titles/')
+        response = user_client.get('/api/v1/timings/')
+        assert response.status_code == 403, (
+            'Проверьте, что статистика задержек доступна только '
+            'администратору'
+        )
+        response = admin_client.get('/api/v1/timings/')
+        assert response.status_code == 200
+        titles = response.json()['GET api:titles-list']
+        assert titles['count'] == 3, (
+            'Проверьте, что задержки собираются по представлениям'
+        )
+        assert titles['p50'] <= titles['p95'] <= titles['p99']
+        assert titles['mean_queries'] >= 1
+
+
+class Test13PrometheusMetrics:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_metrics(self, client, admin_client, settings):
+        settings.METRICS_ALLOWED_NETWORKS = ['127.0.0.0/8']
+        settings.API_CACHE_TIMEOUT = 60
+        create_titles(admin_client)
+        admin_client.get('/api/v1/titles/')
+        admin_client.get('/api/v1/titles/')
+        response = client.get('/metrics')
+        assert response.status_code == 200, (
+            'Проверьте, что `/metrics` доступен с адресов из '
+            '`METRICS_ALLOWED_NETWORKS`'
+        )
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        for name in (
+            'yamdb_http_requests_total{route="api:titles-list",'
+            'method="GET",status="200"}',
+            'yamdb_http_request_duration_seconds_bucket{'
+            'route="api:titles-list",method="GET",le="+Inf"}',
+            'yamdb_db_query_duration_seconds_count',
+            'yamdb_db_lock_timeouts_total 0',
+            'yamdb_api_cache_requests_total{result="hit"}',
+            'yamdb_write_queue_depth',
+            'yamdb_write_queue_lock_retries_total',
+        ):
+            assert name in text, (
+                f'Проверьте, что `/metrics` содержит `{name}`'
+            )
+
+    def test_02_metrics_access(self, client, settings):
+        settings.METRICS_TOKEN = 'secret'
+        response = client.get('/metrics')
+        assert response.status_code == 403, (
+            'Проверьте, что по умолчанию `/metrics` недоступен без токена '
+            'даже с локального адреса: за прокси это адрес прокси'
+        )
+        response = client.get('/metrics', REMOTE_ADDR='10.0.0.1')
+        assert response.status_code == 403, (
+            'Проверьте, что `/metrics` недоступен с посторонних адресов'
+        )
+        response = client.get(
+            '/metrics', REMOTE_ADDR='10.0.0.1',
+            HTTP_AUTHORIZATION='Bearer secret'
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что `/metrics` доступен по токену `METRICS_TOKEN`'
+        )
+        response = client.get(
+            '/metrics', REMOTE_ADDR='10.0.0.1',
+            HTTP_AUTHORIZATION='Bearer sécret'
+        )
+        assert response.status_code == 403
+
+
+class Test13RequestProfiling:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_profile_request(self, admin_client):
+        create_titles(admin_client)
+        response = admin_client.get(
+            '/api/v1/titles/?genre=', HTTP_X_PROFILE='1'
+        )
+        assert response.status_code == 200
+        assert 'X-Profile-Id' in response, (
+            'Проверьте, что запрос администратора с заголовком `X-Profile` '
+            'профилируется и ответ содержит `X-Profile-Id`'
+        )
+        profile = admin_client.get(
+            f'/api/v1/profiles/{response["X-Profile-Id"]}/'
+        ).json()
+        assert profile['view'] == 'api:titles-list'
+        assert profile['path'] == '/api/v1/titles/?genre='
+        assert profile['functions'] and profile['internal'], (
+            'Проверьте, что профиль содержит самые затратные функции'
+        )
+        assert not any(
+            'traceback' in function['function']
+            for function in profile['functions']
+        ), (
+            'Проверьте, что запись хронологии SQL не попадает в профиль'
+        )
+        queries = profile['queries']
+        assert len(queries) == profile['queries_total'] >= 1, (
+            'Проверьте, что профиль содержит хронологию запросов к БД'
+        )
+        assert queries == sorted(queries, key=lambda query: query['start_ms'])
+        assert all(
+            query['sql'] and query['origin'] for query in queries
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_profile_only_for_admin(self, admin_client, user_client):
+        response = admin_client.get('/api/v1/titles/')
+        assert 'X-Profile-Id' not in response, (
+            'Проверьте, что без заголовка `X-Profile` запрос '
+            'не профилируется'
+        )
+        response = user_client.get('/api/v1/titles/', HTTP_X_PROFILE='1')
+        assert response.status_code == 200
+        assert 'X-Profile-Id' not in response, (
+            'Проверьте, что заголовок `X-Profile` учитывается только '
+            'от администратора'
+        )
+        profile_id = admin_client.get(
+            '/api/v1/titles/', HTTP_X_PROFILE='1'
+        )['X-Profile-Id']
+        response = user_client.get(f'/api/v1/profiles/{profile_id}/')
+        assert response.status_code == 403, (
+            'Проверьте, что профили доступны только администратору'
+        )
+        response = admin_client.get('/api/v1/profiles/unknown/')
+        assert response.status_code == 404
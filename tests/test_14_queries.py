@@ -0,0 +1,119 @@
+import pytest
+
+from .common import create_comments
+
+
+@pytest.fixture
+def catalogue(admin_client, admin, django_user_model):
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+    category = Category.objects.create(name='Журналы', slug='magazines')
+    genres = [
+        Genre.objects.create(name=f'Жанр {number}', slug=f'genre-{number}')
+        for number in range(3)
+    ]
+    title = Title.objects.get(pk=titles[0]['id'])
+    review = Review.objects.get(pk=reviews[0]['id'])
+    for number in range(8):
+        author = django_user_model.objects.create_user(
+            username=f'reader{number}', email=f'reader{number}@yamdb.fake'
+        )
+        extra = Title.objects.create(
+            name=f'Книга {number}', year=2000, category=category
+        )
+        extra.genre.set(genres)
+        Review.objects.create(
+            title=title, author=author, text='Отзыв', score=5
+        )
+        Comment.objects.create(review=review, author=author, text='Ответ')
+    return title, review
+
+
+class Test14QueryBudgets:
+
+    def test_01_fingerprint(self):
+        from core.querylog import fingerprint
+
+        assert fingerprint(
+            'SELECT * FROM t WHERE id IN (%s, %s, %s) AND x = 10'
+        ) == fingerprint(
+            "SELECT * FROM t WHERE id IN (%s, %s) AND x = 'a'"
+        ), 'Проверьте, что отпечаток запроса не зависит от значений'
+
+    def test_02_detects_repeated_queries(self):
+        from core.querylog import QueryLog
+
+        log = QueryLog(repeat_threshold=3, slow_query_ms=1000)
+        for pk in range(4):
+            log(lambda *args: None,
+                f'SELECT * FROM t WHERE id = {pk}', (), False, {})
+        log(lambda *args: None, 'SELECT 1', (), False, {})
+        assert [count for _, count, _ in log.repeated()] == [4], (
+            'Проверьте, что повторяющиеся запросы одной формы отмечаются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_api_within_budget(self, admin_client, catalogue):
+        from core import querylog
+
+        title, review = catalogue
+        urls = [
+            '/api/v1/titles/?limit=10',
+            f'/api/v1/titles/{title.pk}/',
+            f'/api/v1/titles/{title.pk}/reviews/',
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/',
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+        ]
+        for url in urls:
+            assert admin_client.get(url).status_code == 200, url
+        assert not querylog.violations, (
+            'Проверьте, что запросы к API укладываются в `QUERY_BUDGETS` '
+            'и не выполняют N+1 запросов:\n'
+            + '\n'.join(querylog.violations)
+        )
+        querylog.violations.clear()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_delete_title_updates_rating_once(self, admin_client,
+                                                 catalogue):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Title
+
+        title, _ = catalogue
+        assert title.reviews.count() > 5
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.delete(f'/api/v1/titles/{title.pk}/')
+        assert response.status_code == 204
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ]
+        assert len(updates) <= 1, (
+            'Проверьте, что при удалении произведения рейтинг '
+            'пересчитывается не для каждого отзыва, а одним запросом '
+            'после фиксации транзакции'
+        )
+        assert len(context.captured_queries) < 30
+        assert not Title.objects.filter(pk=title.pk).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_rating_updated_on_commit(self, admin_client, catalogue):
+        from django.db import transaction
+
+        from reviews.models import Review, Title
+
+        title, _ = catalogue
+        with transaction.atomic():
+            Review.objects.filter(title=title).update(score=1)
+            for review in Review.objects.filter(title=title):
+                review.save()
+            assert Title.objects.get(pk=title.pk).rating != 1
+        assert Title.objects.get(pk=title.pk).rating == 1, (
+            'Проверьте, что рейтинг произведения пересчитывается после '
+            'фиксации транзакции с изменениями отзывов'
+        )
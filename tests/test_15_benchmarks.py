@@ -0,0 +1,45 @@
+from benchmarks import endpoints
+
+
+class Test15EndpointBenchmarks:
+
+    def test_01_every_route_has_case(self, django_user_model):
+        cases = endpoints.get_cases({
+            'admin': 'Bearer token', 'refresh': 'token', 'comment': 1,
+            'profile': 'id',
+            'user': django_user_model(username='reader'),
+        })
+
+        missing = endpoints.get_routes() - {case['route'] for case in cases}
+
+        assert not missing, (
+            'Добавьте в benchmarks/endpoints.py сценарии для адресов '
+            f'{", ".join(sorted(missing))}'
+        )
+
+    def test_02_compare(self):
+        base = {'p50_ms': 10.0, 'cpu_ms': 8.0, 'queries': 3}
+        thresholds = endpoints.THRESHOLDS
+        baseline = {'titles': base, 'title': base}
+
+        assert not endpoints.compare(
+            {'titles': {**base, 'p50_ms': 12.0, 'cpu_ms': 9.0}},
+            baseline, thresholds
+        ), (
+            'Проверьте, что изменения в пределах порогов не считаются '
+            'регрессией'
+        )
+        regressions = endpoints.compare(
+            {
+                'titles': {**base, 'queries': 4},
+                'title': {**base, 'cpu_ms': 12.0},
+                'new': base,
+            },
+            baseline, thresholds
+        )
+        assert [message.split(':')[0] for message in regressions] == [
+            'titles', 'title'
+        ], (
+            'Проверьте, что рост числа запросов к БД и времени процессора '
+            'сверх порогов считается регрессией'
+        )